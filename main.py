@@ -1,6 +1,5 @@
 import streamlit as st
 from components.progress_bar import show_progress_bar
-from pages import input_page, edit_page, voices_page, themes_page, generate_page, text_extraction
 from utils.session_state import initialize_session_state
 from utils.helpers import reset_script_state
 
@@ -19,17 +18,25 @@ def main():
 
     step = st.session_state.current_step
 
+    # Only the current step's page is imported; the others (and their heavy
+    # dependencies: pydub, bs4, python-docx, Gemini SDK) load when first visited.
     if step == 1:
+        from pages import input_page
         input_page.show()
     elif step == 2:
+        from pages import text_extraction
         text_extraction.show_text_extraction_review()           # Preview/Edit
     elif step == 3:
+        from pages import voices_page
         voices_page.show_speaker_selection()        # Pick Speakers
     elif step == 4:
+        from pages import themes_page
         themes_page.show_themes_page()
     elif step == 5:
+        from pages import edit_page
         edit_page.show()          # Final touches page?
     elif step == 6:
+        from pages import generate_page
         generate_page.show()
     else:
         st.error(f"⚠️ Unknown step: {step}")
@@ -2,14 +2,29 @@
 # --- Podcast üreten çekirdek modül ---
 
 from __future__ import annotations
-import os, io, json, hashlib
-from typing import List, Dict, Any, Optional
+import os, re, json, time, base64, random, hashlib, logging, tempfile, threading, subprocess, contextvars, unicodedata
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager, nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
 
 import requests
+from urllib3.exceptions import ProtocolError
 from pydub import AudioSegment
 
+from .audio_cache import CacheIndex
+from .audio_codec import decode_mp3, encode_mp3, export_mp3
+from .http_session import get_session, timeouts
+from .mp3_frames import Mp3Stream, concat_mp3, parse_mp3, probe_mp3, read_mp3
+from .tts_pool import FairShareGate, current as _tts_tenant, tenant as tts_tenant
+from .tts_websocket import SessionPool
+
 # ------------------------------------------------------------
 # 0) API KEY - Güvenli okuma (env ya da .streamlit/secrets.toml)
+#    Import sırasında okunmaz: anahtar ilk TTS isteğinde çözülür, yoksa
+#    hata o isteği yapan render'da çıkar (uygulama açılışında değil).
 # ------------------------------------------------------------
 def _read_api_key() -> str:
     # Streamlit ile çalışıyorsak secrets'tan da deneyelim
@@ -24,7 +39,16 @@ def _read_api_key() -> str:
         raise RuntimeError("ELEVEN_API_KEY bulunamadı (env veya .streamlit/secrets.toml).")
     return api
 
-ELEVEN_API_KEY = _read_api_key()
+ELEVEN_API_KEY: Optional[str] = None  # ilk kullanımda _api_key() doldurur
+
+def _api_key() -> str:
+    global ELEVEN_API_KEY
+    if not ELEVEN_API_KEY:
+        ELEVEN_API_KEY = _read_api_key()
+    return ELEVEN_API_KEY
+
+# Yerel test sunucusuna yönlendirmek için değiştirilebilir
+ELEVEN_API_BASE = os.getenv("ELEVEN_API_BASE", "https://api.elevenlabs.io").rstrip("/")
 
 # ------------------------------------------------------------
 # 1) Public (herkeste çalışan) voice ID'leri
@@ -42,59 +66,800 @@ VOICE_MAP: Dict[str, str] = {
 }
 
 # ------------------------------------------------------------
-# 2) Basit disk cache (aynı paragraf + aynı ses = tekrar istek atma)
+# 2) Disk cache (aynı paragraf + aynı ses + aynı ayarlar = tekrar istek atma)
+#    Anahtar; metin, ses, model, voice_settings, output_format ve şema
+#    sürümünü kapsar. Ayarlardan biri değişirse eski ses dönmez.
+#    Dosya adı: {voice_id}_v{CACHE_SCHEMA_VERSION}_{sha256}.mp3
+#    Cache'te API'nin döndürdüğü byte'lar durur; toplu istekten kesilip
+#    yeniden encode edilen parçalar ayrı anahtardadır (origin="batch", bkz. 3c).
+# ------------------------------------------------------------
+CACHE_DIR = "audio_cache"  # klasör ilk kullanımda (CacheIndex) oluşturulur
+
+CACHE_SCHEMA_VERSION = 2  # anahtar içeriği/formatı değişirse artır
+DEFAULT_MODEL_ID = "eleven_turbo_v2"
+DEFAULT_VOICE_SETTINGS: Dict[str, float] = {"stability": 0.5, "similarity_boost": 0.5}
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"  # API'nin varsayılanı
+
+# SQLite indeks (boyut / son erişim / hit / ses) + LRU bütçe → modules/audio_cache.py
+_INDEX: Optional[CacheIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+def _index() -> CacheIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX.cache_dir != CACHE_DIR:
+            _INDEX = CacheIndex(CACHE_DIR)
+        return _INDEX
+
+# Süren render'ın kullandığı cache dosyaları tahliyeden korunur (bkz. _with_cached);
+# worker thread'leri bağlamı kopyaladığı için pin fonksiyonu onlara da geçer
+_RENDER_PIN: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "faba_render_pin", default=None)
+
+@contextmanager
+def _pin_render() -> Iterator[None]:
+    with _index().pinned() as pin:
+        token = _RENDER_PIN.set(pin)
+        try:
+            yield
+        finally:
+            _RENDER_PIN.reset(token)
+
+# ------------------------------------------------------------
+# 2a) Metin kanonikleştirme (hash'lemeden ve API'ye göndermeden önce)
+#     Sadece tırnak tipi, NBSP, çift boşluk ya da NFC/NFD farkı olan
+#     paragraflar aynı sesi üretir; ayrı cache dosyası / ayrı ücretli istek
+#     olmasın. Kurallar FABA_TEXT_CANON ile (virgülle) seçilir, "" = kapalı.
 # ------------------------------------------------------------
-CACHE_DIR = "audio_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+_QUOTES = str.maketrans({
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'", "\u2032": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"', "\u2033": '"',
+    "\u00ab": '"', "\u00bb": '"',
+})
+_SPACES = str.maketrans({c: " " for c in "\u00a0\u2007\u202f\u2009\u200a\u2002\u2003\u3000"})
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+_DASHES = str.maketrans({"\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2015": "-", "\u2212": "-"})
+_WS_RUN = re.compile(r"\s+")
+
+TEXT_CANON_RULES: Dict[str, Callable[[str], str]] = {
+    "nfc": lambda t: unicodedata.normalize("NFC", t),
+    "quotes": lambda t: t.translate(_QUOTES),          # “ ” ‘ ’ « » → " '
+    "nbsp": lambda t: t.translate(_SPACES),            # NBSP / ince boşluk → boşluk
+    "zero_width": lambda t: _ZERO_WIDTH.sub("", t),    # ZWSP, soft hyphen, BOM
+    "dashes": lambda t: t.translate(_DASHES),          # – — − → -  (duraklamayı etkileyebilir)
+    "spaces": lambda t: _WS_RUN.sub(" ", t),           # boşluk dizileri → tek boşluk
+}
+DEFAULT_CANON_RULES = ("nfc", "quotes", "nbsp", "zero_width", "spaces")
+CANON_RULES: Tuple[str, ...] = tuple(
+    r.strip() for r in os.getenv("FABA_TEXT_CANON", ",".join(DEFAULT_CANON_RULES)).split(",") if r.strip()
+)
 
-def _cache_name(text: str, voice_id: str) -> str:
+def canonicalize_text(text: str, rules: Optional[Iterable[str]] = None) -> str:
+    """Seçili kuralları TEXT_CANON_RULES sırasıyla uygular ve kenar boşluklarını atar."""
+    active = set(CANON_RULES if rules is None else rules)
+    unknown = active - set(TEXT_CANON_RULES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen kanonikleştirme kuralı: {', '.join(sorted(unknown))}")
+    text = text or ""
+    for name, rule in TEXT_CANON_RULES.items():
+        if name in active:
+            text = rule(text)
+    return text.strip()
+
+def _cache_key(
+    text: str,
+    voice_id: str,
+    model_id: Optional[str] = DEFAULT_MODEL_ID,
+    voice_settings: Optional[Dict[str, Any]] = None,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+    origin: str = "api",
+) -> str:
+    fields: Dict[str, Any] = {
+        "v": CACHE_SCHEMA_VERSION,
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id or "",
+        "voice_settings": voice_settings if voice_settings is not None else DEFAULT_VOICE_SETTINGS,
+        "output_format": output_format,
+    }
+    if origin != "api":  # API byte'larının anahtarı değişmesin
+        fields["origin"] = origin
+    blob = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _cache_name(text: str, voice_id: str, **params: Any) -> str:
+    key = _cache_key(text, voice_id, **params)
+    return os.path.join(CACHE_DIR, f"{voice_id}_v{CACHE_SCHEMA_VERSION}_{key}.mp3")
+
+# v1 (eski) şema: sadece metin + ses → {voice_id}_{md5(text)}.mp3
+# Bu dosyaların hepsi varsayılan model/ayarlar/format ile üretildi.
+_LEGACY_NAME = re.compile(r"^(?P<voice>[A-Za-z0-9]+)_(?P<md5>[0-9a-f]{32})\.mp3$")
+
+def _legacy_cache_name(text: str, voice_id: str) -> str:
     h = hashlib.md5(text.encode("utf-8")).hexdigest()
     return os.path.join(CACHE_DIR, f"{voice_id}_{h}.mp3")
 
+def _is_default_params(model_id: Optional[str], voice_settings: Optional[Dict[str, Any]], output_format: str) -> bool:
+    return (
+        model_id == DEFAULT_MODEL_ID
+        and (voice_settings is None or voice_settings == DEFAULT_VOICE_SETTINGS)
+        and output_format == DEFAULT_OUTPUT_FORMAT
+    )
+
+def migrate_legacy_cache(json_paths: Iterable[str]) -> Dict[str, int]:
+    """
+    Eski {voice_id}_{md5}.mp3 dosyalarını API'ye gitmeden yeni anahtarlara taşır.
+    md5'ten metin geri çıkarılamadığı için metinler verilen script JSON'larından
+    okunur; eşleşen her dosya (hangi ses olursa olsun) yeniden adlandırılır.
+    Eşleşmeyenler yerinde kalır; o metin ileride istenirse _tts_file onu da sahiplenir.
+    """
+    _index()  # klasör yoksa oluşturur
+    legacy: Dict[str, List[str]] = {}  # md5 -> [voice_id, ...]
+    for name in os.listdir(CACHE_DIR):
+        m = _LEGACY_NAME.match(name)
+        if m:
+            legacy.setdefault(m.group("md5"), []).append(m.group("voice"))
+
+    stats = {"legacy": sum(len(v) for v in legacy.values()), "migrated": 0, "unmatched": 0}
+    for path in json_paths:
+        try:
+            segments = _load_segments(path)
+        except (OSError, ValueError):
+            continue
+        for seg in segments:
+            h = hashlib.md5(seg["text"].encode("utf-8")).hexdigest()
+            for vid in legacy.pop(h, []):
+                os.replace(
+                    os.path.join(CACHE_DIR, f"{vid}_{h}.mp3"),
+                    _cache_name(canonicalize_text(seg["text"]), vid),
+                )
+                stats["migrated"] += 1
+    stats["unmatched"] = sum(len(v) for v in legacy.values())
+    _index().reindex()
+    return stats
+
+def canonicalization_report(json_paths: Iterable[str], rules: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Kanonikleştirme mevcut cache'te ne kazandırırdı? (dosyalara dokunmaz)
+    Cache dosya adları hash olduğu için metinler script JSON'larından okunur ve
+    cache'teki her sesle eşleştirilir: v1 adı ({voice}_{md5}), ham metinli v2
+    adı ya da (migrate / yeni render sonrası) kanonik metinli v2 adı – hangisi
+    diskteyse. Eşleşen her (metin, ses) geçişi bir istek sayılır; boş
+    cache'ten sırayla üretildiğinde:
+    - paid_raw: mevcut cache'in ödediği istek sayısı (= eşleşen dosya sayısı)
+    - paid_canon: kanonik anahtarla ödenecek olan
+    - redundant_bytes: kanonik olarak başka bir dosyanın kopyası olan dosyalar
+    - hit_rate_raw / hit_rate_canon: 1 - ödenen / toplam istek
+    """
+    occurrences: List[str] = []
+    for path in json_paths:
+        try:
+            segments = _load_segments(path)
+        except (OSError, ValueError):
+            continue
+        occurrences += [t for t in ((seg.get("text") or "").strip() for seg in segments) if t]
+
+    _index()  # klasör yoksa oluşturur
+    sizes = {n: os.path.getsize(os.path.join(CACHE_DIR, n)) for n in os.listdir(CACHE_DIR) if n.endswith(".mp3")}
+    voices = sorted({n.split("_", 1)[0] for n in sizes})
+    canon_of = {t: canonicalize_text(t, rules) for t in set(occurrences)}
+    total = 0
+    raw_keys: Dict[str, Tuple[str, str]] = {}  # cache dosyası -> (kanonik metin, ses)
+    for t in occurrences:
+        for vid in voices:
+            candidates = (_legacy_cache_name(t, vid), _cache_name(t, vid), _cache_name(canonicalize_text(t), vid))
+            name = next((n for n in map(os.path.basename, candidates) if n in sizes), None)
+            if name is not None:
+                total += 1
+                raw_keys[name] = (canon_of[t], vid)
+    first: Dict[Tuple[str, str], str] = {}
+    redundant = [n for n, k in raw_keys.items() if first.setdefault(k, n) != n]
+    paid_raw, paid_canon = len(raw_keys), len(first)
+    return {
+        "rules": sorted(set(CANON_RULES if rules is None else rules)),
+        "texts": len(canon_of),
+        "canonical_texts": len(set(canon_of.values())),
+        "requests": total,
+        "paid_raw": paid_raw,
+        "paid_canon": paid_canon,
+        "redundant_files": len(redundant),
+        "redundant_bytes": sum(sizes[n] for n in redundant),
+        "hit_rate_raw": 1 - paid_raw / total if total else 0.0,
+        "hit_rate_canon": 1 - paid_canon / total if total else 0.0,
+    }
+
+def _write_atomic(
+    path: str,
+    data: Union[bytes, Iterable[bytes]],
+    check: Optional[Callable[[str], None]] = None,
+) -> int:
+    """
+    Önce aynı klasörde geçici dosyaya yazar, sonra os.replace ile yerine koyar.
+    Okuyan taraf ya eski dosyayı ya da tam yeni dosyayı görür; yarım MP3 asla.
+    data: tek parça bytes ya da parça parça gelen chunk'lar (streaming).
+    check(tmp_path): yerine koymadan önce doğrulama; exception fırlatırsa dosya atılır.
+    Yazılan byte sayısını döner.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-", suffix=".part")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in ([data] if isinstance(data, (bytes, bytearray)) else data):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+        if check:
+            check(tmp)
+        os.replace(tmp, path)
+        return written
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
 # ------------------------------------------------------------
 # 3) ElevenLabs TTS – Sağlamlaştırılmış istek + doğrulama
+#    TTS_STREAMING açıksa /stream endpoint'i kullanılır: yanıt chunk chunk
+#    geçici cache dosyasına yazılır, bitince atomik olarak yerine konur.
+#    İlk byte'a kadar geçen süre ve tepe bellek kullanımı düşer.
+#    TTS_BACKEND="websocket" ise istekler render boyunca ses başına açık
+#    kalan tek websocket üzerinden gider (bkz. modules/tts_websocket.py).
+# ------------------------------------------------------------
+TTS_STREAMING = os.getenv("FABA_TTS_STREAMING", "1") != "0"
+TTS_BACKENDS = ("http", "websocket")
+TTS_BACKEND = os.getenv("FABA_TTS_BACKEND", "http")
+ELEVEN_WS_BASE = os.getenv("FABA_ELEVEN_WS_BASE", "")  # boşsa ELEVEN_API_BASE'ten (http→ws)
+STREAM_CHUNK_BYTES = 16 * 1024
+
+def _tts_error_detail(r: requests.Response) -> Any:
+    # API'nin döndürdüğü gerçek mesajı yüzeye çıkar
+    try:
+        return r.json()
+    except Exception:
+        return r.text
+
+def _raise_for_tts(r: requests.Response) -> None:
+    ctype = r.headers.get("content-type", "")
+    if r.status_code in RETRYABLE_STATUS:
+        raise _RetryableTTS(r.status_code, _tts_error_detail(r), _retry_after_s(r))
+    if r.status_code != 200 or not ctype.startswith("audio/mpeg"):
+        raise RuntimeError(f"ElevenLabs TTS failed ({r.status_code}): {_tts_error_detail(r)}")
+
+# ------------------------------------------------------------
+# 3a) Rate-limit farkındalıklı zamanlayıcı
+#     - token bucket: saniyede en fazla TTS_RATE_PER_S istek
+#     - slot havuzu: aynı anda en fazla TTS_MAX_CONCURRENT istek; boşalan slot
+#       öncelik sınıfına ve oturumlar (kiracılar) arası round-robin'e göre
+#       verilir, büyük bir render küçük işleri bekletmez (bkz. tts_pool)
+#     - 429 / 5xx / bağlantı hatası: Retry-After varsa ona uy (tüm istekler
+#       o süre boyunca durur), yoksa jitter'lı üstel bekleme ile tekrar dene
+#     Quota bitti (401 quota_exceeded) gibi kalıcı hatalar tekrar denenmez.
 # ------------------------------------------------------------
-def _tts(text: str, voice_id: str, model_id: Optional[str] = "eleven_turbo_v2") -> AudioSegment:
+TTS_RATE_PER_S = float(os.getenv("FABA_TTS_RPS", "4"))
+TTS_MAX_CONCURRENT = int(os.getenv("FABA_TTS_CONCURRENCY", "4"))
+TTS_MAX_RETRIES = 5
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+# Bağlantı kurulamadı / zaman aşımı / akış gövdenin ortasında koptu
+# (ChunkedEncodingError ConnectionError alt sınıfı değil)
+RETRYABLE_ERRORS = (
+    requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+    ProtocolError, ConnectionError, TimeoutError,
+)
+
+class TTSRateLimitError(RuntimeError):
+    """Tekrar denemelere rağmen rate limit / geçici hata sürdü."""
+
+class _RetryableTTS(Exception):
+    def __init__(self, status: int, detail: Any, retry_after: Optional[float] = None):
+        super().__init__(f"ElevenLabs TTS failed ({status}): {detail}")
+        self.status = status
+        self.retry_after = retry_after
+
+def _retry_after_s(r: requests.Response) -> Optional[float]:
+    """Retry-After başlığı: saniye ya da HTTP tarihi."""
+    value = r.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class _TTSScheduler:
+    def __init__(
+        self,
+        rate_per_s: float = TTS_RATE_PER_S,
+        max_concurrent: int = TTS_MAX_CONCURRENT,
+        max_retries: int = TTS_MAX_RETRIES,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 30.0,
+    ):
+        self.rate = rate_per_s
+        self.burst = max(1.0, rate_per_s)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.gate = FairShareGate(max_concurrent)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self.retries = 0
+
+    def _take_token(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    if self.rate <= 0:
+                        return  # sınırsız
+                    self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                    self._stamp = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_s = (1 - self._tokens) / self.rate
+                else:
+                    wait_s = self._paused_until - now
+            time.sleep(wait_s)
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def run(self, attempt: Callable[[], Any]) -> Any:
+        for n in range(self.max_retries + 1):
+            with self.gate.slot():
+                self._take_token()  # sıra adil dağıtılan slotta; hız sınırı ondan sonra
+                try:
+                    return attempt()
+                except _RetryableTTS as e:
+                    err: Exception = e
+                    retry_after = e.retry_after
+                except RETRYABLE_ERRORS as e:
+                    err, retry_after = e, None
+            if n == self.max_retries:
+                raise TTSRateLimitError(f"{err} ({self.max_retries} tekrar denemeden sonra)") from err
+            if retry_after is not None:
+                self._pause(retry_after)  # sunucu söylediyse herkes beklesin
+                delay = retry_after
+            else:
+                delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** n))  # full jitter
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+_TTS_SCHEDULER = _TTSScheduler()
+
+_WS_POOL: Optional[SessionPool] = None
+_WS_POOL_LOCK = threading.Lock()
+
+def _ws_pool() -> SessionPool:
+    global _WS_POOL
+    base = ELEVEN_WS_BASE or re.sub(r"^http", "ws", ELEVEN_API_BASE)
+    with _WS_POOL_LOCK:
+        if _WS_POOL is None or _WS_POOL.base_url != base.rstrip("/"):
+            _WS_POOL = SessionPool(base, _api_key())
+        return _WS_POOL
+
+def configure_tts_scheduler(**kwargs: Any) -> None:
+    """rate_per_s / max_concurrent / max_retries / backoff_* ile zamanlayıcıyı yeniden kurar."""
+    global _TTS_SCHEDULER
+    _TTS_SCHEDULER = _TTSScheduler(**kwargs)
+
+def tts_queue_stats() -> Dict[str, Any]:
+    """Ortak TTS kuyruğunun derinliği / bekleme süreleri (sınıf ve kiracı başına) + tekrar deneme sayısı."""
+    stats = _TTS_SCHEDULER.gate.stats()
+    stats["retries"] = _TTS_SCHEDULER.retries
+    return stats
+
+def _check_mp3_file(path: str) -> None:
+    """
+    Bozuk/boş gövdeyi cache'e yazma (eskiden decode bunu yakalıyordu).
+    Yalnızca baştaki birkaç KB okunur: akışla yazılan gövde bellekte toplanmaz.
+    """
+    try:
+        probe_mp3(path)
+    except ValueError as e:
+        raise RuntimeError(f"ElevenLabs TTS returned invalid MP3 ({os.path.getsize(path)} bytes): {e}")
+
+def _tts_file(
+    text: str,
+    voice_id: str,
+    model_id: Optional[str] = DEFAULT_MODEL_ID,
+    voice_settings: Optional[Dict[str, Any]] = None,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+    stream: Optional[bool] = None,
+    accept_batch: bool = False,
+) -> str:
     """
-    Tek bir paragrafı ElevenLabs TTS ile MP3'e çevirir.
+    Tek bir paragrafı ElevenLabs TTS ile MP3'e çevirir ve cache dosya yolunu döner.
     - Audio dönmezse (400/401/limit vb.) exception fırlatır.
-    - Başarılı sonuçları cache'ler.
+    - API'nin döndürdüğü byte'lar olduğu gibi (decode/re-encode yok) atomik yazılır.
+    - Cache hit'te hiçbir decode yapılmaz.
+    - stream: None ise TTS_STREAMING ayarı geçerli.
+    - Metin önce kanonikleştirilir (bkz. 2a); anahtar da istek de kanonik metinle.
+    - accept_batch: API dosyası yoksa toplu istekten kesilmiş parça da kabul (bkz. 3c).
     """
-    text = (text or "").strip()
+    raw_text = (text or "").strip()
+    text = canonicalize_text(raw_text)
     if not text:
         raise ValueError("Boş metin TTS'e gönderilemez.")
 
-    cache_file = _cache_name(text, voice_id)
+    settings = voice_settings if voice_settings is not None else DEFAULT_VOICE_SETTINGS
+    cache_file = _cache_name(text, voice_id, model_id=model_id, voice_settings=settings, output_format=output_format)
+    name = os.path.basename(cache_file)
+    idx = _index()
+    if idx.lookup(name):  # hit: dosya sistemine dokunmadan
+        return cache_file
+    if os.path.exists(cache_file):  # indekste yok ama diskte var (başka süreç / elle kopya)
+        idx.add(name)
+        return cache_file
+    if accept_batch:
+        batch_file = _cache_name(text, voice_id, model_id=model_id, voice_settings=settings,
+                                 output_format=output_format, origin="batch")
+        if idx.lookup(os.path.basename(batch_file)):
+            return batch_file
+        if os.path.exists(batch_file):
+            idx.add(os.path.basename(batch_file))
+            return batch_file
+
+    # Miss: aynı anahtarı üreten başka thread/süreç varsa onu bekle (singleflight)
+    with idx.singleflight(name):
+        # biz beklerken üretildiyse _tts_request onu döner (bkz. _adopt_existing)
+        return _tts_request(text, voice_id, model_id, settings, output_format, stream, cache_file, raw_text)
+
+def _adopt_existing(
+    text: str,
+    voice_id: str,
+    model_id: Optional[str],
+    settings: Dict[str, Any],
+    output_format: str,
+    cache_file: str,
+    raw_text: Optional[str] = None,
+) -> bool:
+    """
+    cache_file zaten diskteyse ya da ham metinle üretilmiş eski bir dosya
+    (v2 ham anahtar / v1) sahiplenildiyse True. singleflight içinde çağrılır.
+    """
+    name = os.path.basename(cache_file)
+    idx = _index()
     if os.path.exists(cache_file):
-        return AudioSegment.from_file(cache_file, format="mp3")
+        idx.add(name)
+        return True
+    raw_text = raw_text or text
+    candidates = []
+    if raw_text != text:
+        candidates.append(_cache_name(raw_text, voice_id, model_id=model_id,
+                                      voice_settings=settings, output_format=output_format))
+    # v1 cache'te varsa (aynı varsayılan ayarlarla üretilmiş) yeniden istek atma, sahiplen
+    if _is_default_params(model_id, settings, output_format):
+        candidates.append(_legacy_cache_name(raw_text, voice_id))
+    for old in candidates:
+        if os.path.exists(old):
+            os.replace(old, cache_file)
+            idx.forget(os.path.basename(old))
+            idx.add(name)
+            return True
+    return False
+
+def _tts_request(
+    text: str,
+    voice_id: str,
+    model_id: Optional[str],
+    settings: Dict[str, Any],
+    output_format: str,
+    stream: Optional[bool],
+    cache_file: str,
+    raw_text: Optional[str] = None,
+) -> str:
+    """
+    Cache miss: kanonikleştirmeden önceki ham metinle üretilmiş bir dosya
+    (v2 ham anahtar ya da v1) varsa onu sahiplenir, yoksa API'den üretip
+    cache_file'a yazar.
+    """
+    if _adopt_existing(text, voice_id, model_id, settings, output_format, cache_file, raw_text):
+        return cache_file
 
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    stream = TTS_STREAMING if stream is None else stream
+    url = f"{ELEVEN_API_BASE}/v1/text-to-speech/{voice_id}{'/stream' if stream else ''}?output_format={output_format}"
     headers = {
         "Accept": "audio/mpeg",
         "Content-Type": "application/json",
-        "xi-api-key": ELEVEN_API_KEY
+        "xi-api-key": _api_key()
     }
     payload: Dict[str, Any] = {
         "text": text,
-        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}
+        "voice_settings": settings,
     }
     if model_id:
         payload["model_id"] = model_id  # public seslerle uyumlu
 
-    r = requests.post(url, json=payload, headers=headers, timeout=60)
+    def _attempt() -> int:
+        if TTS_BACKEND == "websocket":
+            # Metin cümle cümle itilir; ses parçaları üretildikçe gelir
+            body = _ws_pool().synthesize(voice_id, model_id, settings, output_format,
+                                         _split_sentences(text, min_chars=0))
+            return _write_atomic(cache_file, body, check=_check_mp3_file)
+        with get_session().post(url, json=payload, headers=headers, timeout=timeouts(), stream=stream) as r:
+            _raise_for_tts(r)
+            body = r.iter_content(chunk_size=STREAM_CHUNK_BYTES) if stream else r.content
+            return _write_atomic(cache_file, body, check=_check_mp3_file)
 
-    ctype = r.headers.get("content-type", "")
-    if r.status_code != 200 or not ctype.startswith("audio/mpeg"):
-        # API'nin döndürdüğü gerçek mesajı yüzeye çıkar
-        try:
-            detail = r.json()
-        except Exception:
-            detail = r.text
-        raise RuntimeError(f"ElevenLabs TTS failed ({r.status_code}): {detail}")
+    size = _TTS_SCHEDULER.run(_attempt)
+    _index().add(os.path.basename(cache_file), size)
+    return cache_file
+
+# ------------------------------------------------------------
+# 3b) Decode edilmiş PCM için süreç geneli LRU (bellek sınırlı)
+#     Streamlit modülleri süreç başına bir kez import ettiği için bu
+#     singleton tüm rerun'lar ve oturumlar arasında paylaşılır; tek
+#     paragraf değişince diğerleri için ffmpeg tekrar çalışmaz.
+# ------------------------------------------------------------
+PCM_CACHE_MB = int(os.getenv("FABA_PCM_CACHE_MB", "256"))
+
+class _PcmLRU:
+    def __init__(self, capacity_mb: int):
+        self.capacity = capacity_mb * 1024 * 1024
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, AudioSegment]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[AudioSegment]:
+        with self._lock:
+            seg = self._items.get(key)
+            if seg is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return seg
+
+    def put(self, key: str, seg: AudioSegment) -> None:
+        size = len(seg.raw_data)
+        with self._lock:
+            if size > self.capacity:
+                return  # tek başına bütçeyi aşan klibi tutma
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.used -= len(old.raw_data)
+            self._items[key] = seg
+            self.used += size
+            self._shrink()
+
+    def set_capacity(self, capacity_mb: int) -> None:
+        with self._lock:
+            self.capacity = capacity_mb * 1024 * 1024
+            self._shrink()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.used = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.used, "capacity": self.capacity,
+                    "hits": self.hits, "misses": self.misses}
+
+    def _shrink(self) -> None:
+        while self.used > self.capacity and self._items:
+            _, seg = self._items.popitem(last=False)
+            self.used -= len(seg.raw_data)
+
+_PCM_CACHE = _PcmLRU(PCM_CACHE_MB)
+
+def set_pcm_cache_capacity(capacity_mb: int) -> None:
+    """Decode cache bütçesini (MB) çalışma anında değiştirir; 0 = kapalı."""
+    _PCM_CACHE.set_capacity(capacity_mb)
+
+def pcm_cache_stats() -> Dict[str, int]:
+    return _PCM_CACHE.stats()
+
+def _decode(cache_file: str) -> AudioSegment:
+    """Cache dosyasını PCM'e açar; aynı anahtar daha önce açıldıysa bellekten döner."""
+    key = os.path.basename(cache_file)  # dosya adı = cache anahtarı
+    seg = _PCM_CACHE.get(key)
+    if seg is None:
+        seg = decode_mp3(cache_file)  # FABA_CODEC: süreç içi (PyAV) ya da ffmpeg
+        _PCM_CACHE.put(key, seg)
+    return seg
+
+def _with_cached(
+    text: str, voice_id: str, read: Callable[[str], Any], model_id: Optional[str] = DEFAULT_MODEL_ID, **params: Any
+) -> Tuple[str, Any]:
+    """
+    _tts_file + read(yol). İndeks hit'i dosya sistemine bakmadan döner; cache
+    dosyaları elle silinmişse (audio_cache/ temizlendi, indeks duruyor) okuma
+    FileNotFoundError verir: bayat kayıt indeksten düşülür ve segment yeniden
+    üretilir. Render içindeyse dosya render bitene kadar pinlenir.
+    """
+    path = _tts_file(text, voice_id, model_id=model_id, **params)
+    pin = _RENDER_PIN.get()
+    if pin:
+        pin(os.path.basename(path))
+    try:
+        return path, read(path)
+    except FileNotFoundError:
+        _index().forget(os.path.basename(path))
+        path = _tts_file(text, voice_id, model_id=model_id, **params)
+        return path, read(path)
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _tts(text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID, **params: Any) -> AudioSegment:
+    """
+    _tts_file + decode. PCM yalnızca çağıran gerçekten ihtiyaç duyduğunda açılır.
+    """
+    return _with_cached(text, voice_id, _decode, model_id, **params)[1]
+
+def _tts_mp3(text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID, **params: Any) -> Mp3Stream:
+    """concat render'ı için: cache'teki MP3'ün frame'leri (decode yok)."""
+    return _with_cached(text, voice_id, read_mp3, model_id, **params)[1]
+
+def _tts_path(text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID, **params: Any) -> str:
+    """stream render'ı için: dosyası diskte olduğu doğrulanmış cache yolu (PCM tutulmaz)."""
+    return _with_cached(text, voice_id, lambda p: open(p, "rb").close(), model_id, **params)[0]
+
+def tts_preview(text: str, voice_id: str, session: str = "preview") -> bytes:
+    """
+    Ses önizlemesi: kısa iş, "interactive" öncelikle sıraya girer; o an
+    çalışan uzun render'ların bütün kuyruğunu beklemez. MP3 byte'larını döner.
+    websocket backend'de bağlantı, generate_podcast'teki gibi iş bitince kapanır
+    (süren bir render varsa havuz sayaç tuttuğu için onunkiler açık kalır).
+    """
+    with tts_tenant(session, priority="interactive"), _ws_pool() if TTS_BACKEND == "websocket" else nullcontext():
+        return _with_cached(text, voice_id, _read_bytes)[1]
+
+def _tts_with_path(
+    text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID, **params: Any
+) -> Tuple[str, AudioSegment]:
+    """reencode render'ı için: hem cache yolu (önizleme) hem PCM."""
+    return _with_cached(text, voice_id, _decode, model_id, **params)
+
+# ------------------------------------------------------------
+# 3c) Toplu istek: aynı sesle ardışık paragrafları tek istekte üret
+#     /with-timestamps karakter hizalamasıyla ses paragraf sınırlarından
+#     (iki paragraf arasındaki sessizliğin ortasından) kesilir.
+#     Kesim PCM'de yapılıp parçalar tekrar MP3'e encode edilir (MP3 bit
+#     reservoir'i yüzünden frame sınırından kesmek ilk frame'i bozar); yani
+#     ikinci nesil ses, toplu bağlamın tonlamasıyla. Bu yüzden parçalar API
+#     byte'larından AYRI anahtarla (origin="batch") kaydedilir ve yalnızca
+#     batch_paragraphs açık render'lar kullanır (accept_batch); diğer
+#     render'lar (concat'in "ikinci kayıplı encode yok" garantisi dahil)
+#     hiçbir zaman bu parçaları görmez. Manifest'te segment anahtarı "#b"
+#     ekiyle ayrılır (bkz. _segment_keys).
+# ------------------------------------------------------------
+TTS_BATCH_MAX_CHARS = int(os.getenv("FABA_TTS_BATCH_CHARS", "4500"))  # API sınırı 5000, pay bırak
+BATCH_SEPARATOR = "\n\n"
+BATCH_EDGE_MS = 60  # paragraf sınırında konuşmanın etrafında bırakılan pay
+
+def _is_cached(text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID) -> bool:
+    canon = canonicalize_text(text)
+    return any(os.path.exists(_cache_name(canon, voice_id, model_id=model_id, voice_settings=DEFAULT_VOICE_SETTINGS,
+                                          output_format=DEFAULT_OUTPUT_FORMAT, origin=origin))
+               for origin in ("api", "batch"))
+
+_log = logging.getLogger(__name__)
+BATCH_STATS = {"requests": 0, "unsplit": 0, "unsplit_chars": 0}  # unsplit: ödenip kullanılamayan toplu istek
+_BATCH_STATS_LOCK = threading.Lock()
+
+def _alignment_spans(al: Optional[Dict[str, Any]], canon: List[str]) -> Optional[List[Tuple[float, float]]]:
+    """
+    Hizalamadan her paragrafın konuşma aralığı (ms). Karakterler birebir
+    tutuyorsa ofsetlerden; tutmuyorsa (normalized_alignment: sayılar vb.
+    açılmış metin) paragraf ayraçlarının yerinden. Bölünemiyorsa None.
+    """
+    if not al:
+        return None
+    starts, ends = al.get("character_start_times_seconds"), al.get("character_end_times_seconds")
+    if not starts or not ends or len(starts) != len(ends):
+        return None
+    joined = BATCH_SEPARATOR.join(canon)
+    bounds: List[Tuple[int, int]] = []  # paragrafın [ilk, son] karakter indeksi
+    if len(starts) == len(joined):
+        off = 0
+        for t in canon:
+            bounds.append((off, off + len(t) - 1))
+            off += len(t) + len(BATCH_SEPARATOR)
+    else:
+        chars = "".join(al.get("characters") or [])
+        if len(chars) != len(starts):
+            return None
+        seps = list(re.finditer(r"\n\s*\n", chars))
+        if len(seps) != len(canon) - 1:
+            return None
+        edges = [0] + [x for m in seps for x in (m.start(), m.end())] + [len(chars)]
+        for a, b in zip(edges[::2], edges[1::2]):
+            piece = chars[a:b]
+            lead = len(piece) - len(piece.lstrip())
+            trail = len(piece.rstrip())
+            if trail <= lead:
+                return None
+            bounds.append((a + lead, a + trail - 1))
+    return [(starts[a] * 1000, ends[b] * 1000) for a, b in bounds]
+
+def _tts_batch_files(texts: List[str], voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID) -> bool:
+    """
+    texts'i tek istekle üretip paragraf paragraf origin="batch" anahtarıyla
+    cache'e yazar. Her paragrafın (API ve batch anahtarı) singleflight kilidi
+    tutulur (başka render aynı metni üretiyorsa beklenir); cache'te olan ya da
+    eski bir dosyadan sahiplenilen paragraflar istekten çıkarılır. True: hepsi cache'te. False: çağıran
+    kalanları tek tek üretsin (bölünemeyen toplu cevap loglanır ve
+    BATCH_STATS'a yazılır). API hataları aynen fırlar.
+    """
+    settings, fmt = DEFAULT_VOICE_SETTINGS, DEFAULT_OUTPUT_FORMAT
+    raws = [(t or "").strip() for t in texts]
+    canon = [canonicalize_text(t) for t in raws]
+    api_files = [_cache_name(t, voice_id, model_id=model_id, voice_settings=settings, output_format=fmt)
+                 for t in canon]
+    files = [_cache_name(t, voice_id, model_id=model_id, voice_settings=settings, output_format=fmt, origin="batch")
+             for t in canon]
+    idx = _index()
+    with ExitStack() as stack:
+        # Sabit sırayla kilitle: iki toplu istek birbirini beklerken kilitlenmesin
+        for name in sorted({os.path.basename(f) for f in api_files + files}):
+            stack.enter_context(idx.singleflight(name))
+        todo = [k for k in range(len(canon))
+                if not os.path.exists(files[k])
+                and not _adopt_existing(canon[k], voice_id, model_id, settings, fmt, api_files[k], raws[k])]
+        if len(todo) < 2:
+            return not todo
+        canon = [canon[k] for k in todo]
+        files = [files[k] for k in todo]
+
+        joined = BATCH_SEPARATOR.join(canon)
+        url = f"{ELEVEN_API_BASE}/v1/text-to-speech/{voice_id}/with-timestamps?output_format={fmt}"
+        headers = {"Content-Type": "application/json", "xi-api-key": _api_key()}
+        payload: Dict[str, Any] = {"text": joined, "voice_settings": settings}
+        if model_id:
+            payload["model_id"] = model_id
+
+        def _attempt() -> Dict[str, Any]:
+            with get_session().post(url, json=payload, headers=headers, timeout=timeouts()) as r:
+                if r.status_code in RETRYABLE_STATUS:
+                    raise _RetryableTTS(r.status_code, _tts_error_detail(r), _retry_after_s(r))
+                if r.status_code != 200:
+                    raise RuntimeError(f"ElevenLabs TTS failed ({r.status_code}): {_tts_error_detail(r)}")
+                return r.json()
+
+        data = _TTS_SCHEDULER.run(_attempt)
+        spans = None
+        if data.get("audio_base64"):
+            spans = _alignment_spans(data.get("alignment"), canon) or _alignment_spans(data.get("normalized_alignment"), canon)
+        with _BATCH_STATS_LOCK:
+            BATCH_STATS["requests"] += 1
+            if spans is None:
+                BATCH_STATS["unsplit"] += 1
+                BATCH_STATS["unsplit_chars"] += len(joined)
+        if spans is None:
+            _log.warning("TTS cost: %d paragraflık toplu istek (%d karakter, ses %s) hizalamayla bölünemedi; "
+                         "paragraflar tek tek yeniden üretilecek.", len(canon), len(joined), voice_id)
+            return False
 
-    audio = AudioSegment.from_file(io.BytesIO(r.content), format="mp3")
-    audio.export(cache_file, format="mp3")
-    return audio
+        audio = decode_mp3(base64.b64decode(data["audio_base64"]))
+        cuts = [0.0]
+        for (_, end), (nxt, _) in zip(spans, spans[1:]):
+            cuts.append((end + nxt) / 2)
+        cuts.append(float(len(audio)))
+
+        bitrate = fmt.rsplit("_", 1)[-1] + "k"  # mp3_44100_128 → 128k
+        for k, (cache_file, (s_ms, e_ms)) in enumerate(zip(files, spans)):
+            lo = max(cuts[k], s_ms - BATCH_EDGE_MS) if k else 0.0
+            hi = min(cuts[k + 1], e_ms + BATCH_EDGE_MS) if k < len(files) - 1 else cuts[-1]
+            size = _write_atomic(cache_file, encode_mp3(audio[int(lo):int(hi)], bitrate), check=_check_mp3_file)
+            idx.add(os.path.basename(cache_file), size)
+    return True
 
 # ------------------------------------------------------------
 # 4) JSON okuma – farklı formatlara tolerans
@@ -143,26 +908,755 @@ def _resolve_voice_ids(selected_labels: Optional[List[str]]) -> List[str]:
     return ids
 
 # ------------------------------------------------------------
-# 6) ANA FONKSİYON – Podcast üret
+# 6) Paralel sentez – sınırlı worker havuzu
+#    Sonuçlar script sırasıyla döner; hata olursa ilk hatalı
+#    segmentin exception'ı aynen yukarı fırlar.
+#    Script'te tekrar eden (metin, ses) çiftleri ("Welcome back", kapanışlar…)
+#    önce tekilleştirilir: her biri bir kez üretilip/decode edilip tüm
+#    geçtiği yerlerde aynı sonuç kullanılır.
+# ------------------------------------------------------------
+TTS_MAX_WORKERS = 4  # aynı anda uçuşta olabilecek en fazla TTS isteği
+TTS_SHORT_JOB_SEGMENTS = 3  # bu kadar ya da daha az segmentli render "interactive" önceliğe girer
+
+def _job_key(text: str, voice_id: str) -> Tuple[str, str]:
+    """Aynı cache dosyasına düşecek işler için ortak anahtar."""
+    return (canonicalize_text(text), voice_id)
+
+def _plan_unique(jobs: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[List[int]]]:
+    """
+    jobs → (tekil işler, her tekil işin script'teki sıraları).
+    Tekil işler ilk geçtikleri sırayı korur.
+    """
+    slot: Dict[Tuple[str, str], int] = {}
+    unique: List[Tuple[str, str]] = []
+    positions: List[List[int]] = []
+    for i, (text, vid) in enumerate(jobs):
+        k = _job_key(text, vid)
+        if k not in slot:
+            slot[k] = len(unique)
+            unique.append((text, vid))
+            positions.append([])
+        positions[slot[k]].append(i)
+    return unique, positions
+
+def _plan_batches(
+    jobs: List[Tuple[str, str]],
+    model_id: Optional[str] = DEFAULT_MODEL_ID,
+    max_chars: int = TTS_BATCH_MAX_CHARS,
+) -> List[List[int]]:
+    """
+    Ardışık, aynı sesli ve cache'te olmayan işleri max_chars'a kadar gruplar.
+    Cache'tekiler ve tek başına sınırı aşanlar tek elemanlı grup olur.
+    """
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    cur_vid, cur_len = None, 0
+    for i, (text, vid) in enumerate(jobs):
+        n = len(canonicalize_text(text))
+        if _is_cached(text, vid, model_id) or n >= max_chars:
+            if cur:
+                batches.append(cur)
+            batches.append([i])
+            cur, cur_len = [], 0
+            continue
+        if cur and (vid != cur_vid or cur_len + len(BATCH_SEPARATOR) + n > max_chars):
+            batches.append(cur)
+            cur, cur_len = [], 0
+        cur_len += n + (len(BATCH_SEPARATOR) if cur else 0)
+        cur.append(i)
+        cur_vid = vid
+    if cur:
+        batches.append(cur)
+    return batches
+
+def _synthesize_all(
+    jobs: List[Tuple[str, str]],
+    model_id: Optional[str] = DEFAULT_MODEL_ID,
+    max_workers: int = TTS_MAX_WORKERS,
+    worker: Callable[..., Any] = _tts,
+    on_done: Optional[Callable[[int, Any], None]] = None,
+    batch: bool = False,
+) -> List[Any]:
+    """
+    jobs: [(text, voice_id), ...] – script sırasında
+    Tekrarlanan işler bir kez çalışır; sonuç (aynı nesne) her sıraya yazılır
+    ve on_done her sıra için ayrı çağrılır.
+    batch: ardışık aynı sesli paragraflar tek istekte üretilir (bkz. 3c)
+    """
+    unique, positions = _plan_unique(jobs)
+    # websocket backend'de toplu istek yok: bağlantı zaten render boyunca açık (bkz. 3)
+    groups = (_plan_batches(unique, model_id) if batch and TTS_BACKEND == "http"
+              else [[u] for u in range(len(unique))])
+
+    params = {"accept_batch": True} if batch else {}  # toplu istek parçaları yalnızca batch render'da
+
+    def _unit_worker(texts: Tuple[str, ...], vid: str, model: Optional[str]) -> List[Any]:
+        if len(texts) > 1:
+            _tts_batch_files(list(texts), vid, model)  # False ise kalanlar aşağıda tek tek üretilir
+        return [worker(t, vid, model, **params) for t in texts]
+
+    def _fan_out(g: int, res: List[Any]) -> None:
+        for u, r in zip(groups[g], res):
+            for i in positions[u]:
+                on_done(i, r)
+
+    units = [(tuple(unique[u][0] for u in g), unique[g[0]][1]) for g in groups]
+    unit_results = _run_jobs(units, model_id, max_workers, _unit_worker, _fan_out if on_done else None)
+    results: List[Any] = [None] * len(jobs)
+    for g, res in zip(groups, unit_results):
+        for u, r in zip(g, res):
+            for i in positions[u]:
+                results[i] = r
+    return results
+
+# Cümle bazında cache (opt-in): bir paragrafta tek kelime düzeltilince
+# sadece o cümle yeniden üretilir. Cümleler paralel üretilir ve kısa
+# sessizliklerle (sentence_pause_ms) yeniden paragrafa birleştirilir.
+SENTENCE_PAUSE_MS = 150
+SENTENCE_MIN_CHARS = 20  # daha kısa cümleler (ör. "Evet.") bir sonrakiyle birlikte okunur
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-ZÇĞİÖŞÜ0-9])")
+_ABBREV = re.compile(r"(?:\b(?:Dr|Mr|Mrs|Ms|Prof|St|vs|etc|No|Av|Doç|Yrd|bkz|örn)|\b[A-Z])\.$")
+
+def _split_sentences(text: str, min_chars: int = SENTENCE_MIN_CHARS) -> List[str]:
+    """Paragrafı cümlelere böler; kısaltmalarda ve çok kısa cümlelerde bölmez."""
+    sentences: List[str] = []
+    pos = 0
+    for m in _SENTENCE_END.finditer(text):
+        head = text[pos:m.start()].rstrip()
+        if _ABBREV.search(text[:m.start()].rstrip("\"'”’)]")) or len(head) < min_chars:
+            continue
+        sentences.append(text[pos:m.start()].strip())
+        pos = m.end()
+    tail = text[pos:].strip()
+    if tail:
+        if sentences and len(tail) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {tail}"
+        else:
+            sentences.append(tail)
+    return sentences or [text]
+
+def _synthesize_segments(
+    jobs: List[Tuple[str, str]],
+    max_workers: int,
+    worker: Callable[..., Any],
+    on_done: Optional[Callable[[int, List[Any]], None]] = None,
+    split_sentences: bool = False,
+    batch: bool = False,
+) -> List[List[Any]]:
+    """
+    Her segment için parça sonuçlarının listesini döner (bölme yoksa tek parça).
+    Tüm segmentlerin cümleleri tek havuzda (tekilleştirilerek) üretilir;
+    on_done(i, parçalar) segmentin son cümlesi bitince çağrılır.
+    """
+    pieces = [_split_sentences(text) if split_sentences else [text] for text, _ in jobs]
+    flat: List[Tuple[str, str]] = []
+    owner: List[int] = []
+    start: List[int] = []
+    for i, ((_, vid), ps) in enumerate(zip(jobs, pieces)):
+        start.append(len(flat))
+        flat += [(p, vid) for p in ps]
+        owner += [i] * len(ps)
+    remaining = [len(ps) for ps in pieces]
+    got: List[Any] = [None] * len(flat)
+
+    def _piece_done(j: int, res: Any) -> None:
+        got[j] = res
+        i = owner[j]
+        remaining[i] -= 1
+        if remaining[i] == 0:
+            on_done(i, got[start[i]:start[i] + len(pieces[i])])
+
+    results = _synthesize_all(flat, model_id=DEFAULT_MODEL_ID, max_workers=max_workers,
+                              worker=worker, on_done=_piece_done if on_done else None, batch=batch)
+    return [results[start[i]:start[i] + len(ps)] for i, ps in enumerate(pieces)]
+
+def _run_jobs(
+    jobs: List[Tuple[str, str]],
+    model_id: Optional[str] = DEFAULT_MODEL_ID,
+    max_workers: int = TTS_MAX_WORKERS,
+    worker: Callable[..., Any] = _tts,
+    on_done: Optional[Callable[[int, Any], None]] = None,
+) -> List[Any]:
+    """
+    jobs: [(text, voice_id), ...] – script sırasında
+    max_workers <= 1 ise eski davranış: sırayla tek tek istek atılır.
+    worker: _tts (AudioSegment döner) ya da _tts_file (cache yolu döner)
+    on_done(i, sonuç): her segment bittikçe, ÇAĞIRAN thread'de çağrılır
+    (Streamlit elemanları worker thread'inden güncellenemez).
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        results = []
+        for i, (text, vid) in enumerate(jobs):
+            results.append(worker(text, vid, model_id))
+            if on_done:
+                on_done(i, results[-1])
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix="faba-tts")
+    try:
+        # Kiracı bilgisi (tts_pool) contextvar'da; worker thread'lerine taşı
+        futures = [pool.submit(contextvars.copy_context().run, worker, text, vid, model_id) for text, vid in jobs]
+        index = {f: i for i, f in enumerate(futures)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if any(f.exception() is not None for f in done):
+                # Başlamamışları iptal et, çalışanları bekle; script sırasındaki ilk hatayı fırlat
+                for f in pending:
+                    f.cancel()
+                wait([f for f in futures if not f.cancelled()])
+                first = min((f for f in futures if not f.cancelled() and f.exception() is not None), key=index.get)
+                raise first.exception()
+            if on_done:
+                for f in sorted(done, key=index.get):
+                    on_done(index[f], f.result())
+        return [f.result() for f in futures]  # script sırası korunur
+    finally:
+        # Hata durumunda kuyruktaki (henüz başlamamış) istekleri boşuna gönderme
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# ------------------------------------------------------------
+# 7) Tek geçişte birleştirme (lineer zaman)
+#    `final_audio += clip` her seferinde biriken PCM'i kopyaladığı için
+#    karesel büyüyordu. Burada toplam frame sayısı önceden hesaplanır,
+#    tek bir bytearray ayrılır ve AudioSegment en sonda bir kez kurulur.
+# ------------------------------------------------------------
+INTRO_MS = 1000  # 1 sn intro
+
+def _silence_frames(ms: int, frame_rate: int) -> int:
+    return int(round(max(ms, 0) * frame_rate / 1000.0))
+
+def _assemble(
+    clips: List[AudioSegment], gap_ms: int, intro_ms: int = 1000
+) -> Tuple[AudioSegment, List[Tuple[int, int]]]:
+    """
+    [intro sessizliği] + (clip + gap sessizliği) * N  →  tek AudioSegment
+    Farklı formattaki klipler pydub'ın `+` davranışı gibi en yüksek
+    kanal / frame_rate / sample_width değerine yükseltilir.
+    İkinci değer: her klibin (sample offset, sample sayısı) aralığı.
+    """
+    if not clips:
+        return AudioSegment.silent(duration=intro_ms), []
+
+    channels = max(c.channels for c in clips)
+    frame_rate = max(c.frame_rate for c in clips)
+    sample_width = max(c.sample_width for c in clips)
+    frame_width = channels * sample_width
+
+    def _normalize(c: AudioSegment) -> AudioSegment:
+        if c.channels != channels:
+            c = c.set_channels(channels)
+        if c.frame_rate != frame_rate:
+            c = c.set_frame_rate(frame_rate)
+        if c.sample_width != sample_width:
+            c = c.set_sample_width(sample_width)
+        return c
+
+    clips = [_normalize(c) for c in clips]
+    intro_bytes = _silence_frames(intro_ms, frame_rate) * frame_width
+    gap_bytes = _silence_frames(gap_ms, frame_rate) * frame_width
+    total = intro_bytes + sum(len(c.raw_data) + gap_bytes for c in clips)
+
+    # bytearray sıfırla dolu gelir → sessizlik bölgelerine yazmaya gerek yok
+    buf = bytearray(total)
+    view = memoryview(buf)
+    spans: List[Tuple[int, int]] = []
+    pos = intro_bytes
+    for c in clips:
+        data = c.raw_data
+        view[pos:pos + len(data)] = data
+        spans.append((pos // frame_width, len(data) // frame_width))
+        pos += len(data) + gap_bytes
+    view.release()
+
+    audio = AudioSegment(
+        data=bytes(buf),
+        sample_width=sample_width,
+        frame_rate=frame_rate,
+        channels=channels,
+    )
+    return audio, spans
+
+def _join_clips(clips: List[AudioSegment], pause_ms: int) -> AudioSegment:
+    """Cümle kliplerini aralarında pause_ms sessizlikle tek klip yapar."""
+    if len(clips) == 1:
+        return clips[0]
+    audio, _ = _assemble(clips, gap_ms=pause_ms, intro_ms=0)
+    tail = _silence_frames(pause_ms, audio.frame_rate)  # son klipten sonraki ara
+    return audio.get_sample_slice(0, int(audio.frame_count()) - tail)
+
+def _join_items(parts: List[Any], pause_ms: int) -> Any:
+    """concat_mp3 için: cümle MP3'leri + aralar tek grup item (tek parça ise kendisi)."""
+    if len(parts) == 1:
+        return parts[0]
+    items: List[Any] = []
+    for p in parts:
+        items += [p, pause_ms]
+    return items[:-1]
+
+# ------------------------------------------------------------
+# 8) İlerleme bildirimi + bitmiş baş kısmı dinletme
+#    Her segment bittikçe on_progress(RenderProgress) çağrılır. preview_path
+#    verilirse, baştan itibaren kesintisiz bitmiş segmentler cache'teki MP3'lerden
+#    frame birleştirme ile (decode yok, ucuz) o dosyaya yazılır; kullanıcı
+#    render sürerken dinlemeye başlayabilir.
+# ------------------------------------------------------------
+@dataclass
+class RenderProgress:
+    done: int                 # biten segment sayısı (yeniden kullanılanlar dahil)
+    total: int
+    index: int                # son biten segmentin script'teki sırası (-1: yok)
+    elapsed_s: float
+    eta_s: Optional[float]    # kalan tahmini süre (sentezlenen segment hızına göre)
+    phase: str                # "synth" | "assemble" | "done"
+    prefix_done: int          # baştan itibaren kesintisiz biten segment sayısı
+    prefix_path: Optional[str] = None  # bu bildirimde önizleme güncellendiyse yolu
+
+class _ProgressTracker:
+    def __init__(
+        self,
+        total: int,
+        gap_ms: int,
+        callback: Optional[Callable[[RenderProgress], None]],
+        preview_path: Optional[str],
+        preview_interval_s: float,
+    ):
+        self.total = total
+        self.gap_ms = gap_ms
+        self.callback = callback
+        self.preview_path = preview_path
+        self.preview_interval_s = preview_interval_s
+        self.started = time.monotonic()
+        self.ready: Dict[int, Any] = {}  # script sırası → concat item (MP3 yolu / Mp3Stream)
+        self.fresh_total = total
+        self.fresh_done = 0
+        self.prefix = 0
+        self._preview_prefix = 0
+        self._preview_at = 0.0
+
+    def start(self, reused: Dict[int, Any]) -> None:
+        """Önceki çıktıdan gelen (sentezlenmeyecek) segmentleri baştan hazır say."""
+        self.ready.update(reused)
+        self.fresh_total = self.total - len(reused)
+        self._advance(-1, "synth")
+
+    def done(self, index: int, item: Any) -> None:
+        self.ready[index] = item
+        self.fresh_done += 1
+        self._advance(index, "synth")
+
+    def phase(self, name: str) -> None:
+        self._advance(-1, name)
+
+    def _advance(self, index: int, phase: str) -> None:
+        while self.prefix in self.ready:
+            self.prefix += 1
+        if not self.callback:
+            return
+        elapsed = time.monotonic() - self.started
+        eta = None
+        if self.fresh_done:
+            eta = elapsed / self.fresh_done * (self.fresh_total - self.fresh_done)
+        elif self.fresh_total == 0:
+            eta = 0.0
+        self.callback(RenderProgress(
+            done=len(self.ready), total=self.total, index=index,
+            elapsed_s=elapsed, eta_s=eta, phase=phase,
+            prefix_done=self.prefix, prefix_path=self._maybe_preview(phase),
+        ))
+
+    def _maybe_preview(self, phase: str) -> Optional[str]:
+        if not self.preview_path or phase != "synth" or self.prefix <= self._preview_prefix:
+            return None
+        now = time.monotonic()
+        if self._preview_prefix and now - self._preview_at < self.preview_interval_s:
+            return None
+        items: List[Any] = [INTRO_MS]
+        for i in range(self.prefix):
+            items += [self.ready[i], self.gap_ms]
+        try:
+            concat_mp3(items, self.preview_path)
+        except (ValueError, OSError):
+            return None  # karışık format, tahliye edilmiş segment vb. – önizleme olmadan devam
+        self._preview_prefix, self._preview_at = self.prefix, now
+        return self.preview_path
+
+# ------------------------------------------------------------
+# 9) Render manifest + artımlı (incremental) render
+#    Çıktının yanına <çıktı>.manifest.json yazılır: her segmentin cache
+#    anahtarı, sesi, metin hash'i, çıktıdaki byte/sample aralığı ve süresi.
+#    Bir sonraki render'da yeni script manifest ile karşılaştırılır:
+#      - concat modunda değişmeyen segmentlerin frame'leri önceki çıktıdan
+#        byte byte kopyalanır (cache'ten silinmiş olsalar bile API'ye gidilmez),
+#        yalnızca yeni/değişen segmentler sentezlenir.
+#      - reencode modunda önceki çıktı zaten kayıplı encode edilmiş olduğu için
+#        oradan PCM kopyalamak her düzenlemede bir kuşak kalite kaybı demek;
+#        değişmeyenler disk cache + PCM LRU'dan gelir, sadece son encode tekrar eder.
+#    Manifest ayrıca render girdisinin parmak izini tutar; hiçbir şey
+#    değişmediyse generate_podcast hiçbir şeye dokunmadan mevcut çıktıyı döner.
+# ------------------------------------------------------------
+MANIFEST_VERSION = 1
+
+def _manifest_path(out_path: str) -> str:
+    return out_path + ".manifest.json"
+
+def _segment_key(text: str, voice_id: str, model_id: Optional[str] = DEFAULT_MODEL_ID) -> str:
+    """Manifest'teki segment kimliği = cache dosya adı (tüm TTS parametrelerini kapsar)."""
+    return os.path.basename(_cache_name(canonicalize_text(text), voice_id, model_id=model_id,
+                                         voice_settings=DEFAULT_VOICE_SETTINGS,
+                                         output_format=DEFAULT_OUTPUT_FORMAT))
+
+def _load_manifest(out_path: str) -> Optional[Dict[str, Any]]:
+    """Geçerli ve çıktı dosyasıyla tutarlı bir manifest varsa döner."""
+    try:
+        with open(_manifest_path(out_path), "r", encoding="utf-8") as f:
+            m = json.load(f)
+        if m.get("version") != MANIFEST_VERSION:
+            return None
+        if os.path.getsize(out_path) != m.get("output_bytes"):
+            return None  # çıktı başka biri tarafından değiştirilmiş
+        return m
+    except (OSError, ValueError):
+        return None
+
+def _render_fingerprint(jobs: List[Tuple[str, str]], **settings: Any) -> str:
+    """
+    Render girdisinin tamamının özeti: segmentler (kanonik metin + ses) ve
+    sesi etkileyen tüm ayarlar. Aynı parmak izi = bayt bayt aynı çıktı.
+    """
+    blob = json.dumps(
+        {
+            "manifest": MANIFEST_VERSION,
+            "cache": CACHE_SCHEMA_VERSION,
+            "model_id": DEFAULT_MODEL_ID,
+            "voice_settings": DEFAULT_VOICE_SETTINGS,
+            "output_format": DEFAULT_OUTPUT_FORMAT,
+            "intro_ms": INTRO_MS,
+            "canon": sorted(CANON_RULES),
+            "segments": [[canonicalize_text(text), vid] for text, vid in jobs],
+            **settings,
+        },
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _write_manifest(out_path: str, manifest: Dict[str, Any]) -> None:
+    manifest["version"] = MANIFEST_VERSION
+    manifest["output_bytes"] = os.path.getsize(out_path)
+    _write_atomic(_manifest_path(out_path), json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+
+def _segment_keys(jobs: List[Tuple[str, str]], sentence_pause_ms: Optional[int], batch: bool = False) -> List[str]:
+    # Cümle modunda segmentin sesi (aralar dahil) farklı; önceki çıktıdan yanlış kopya olmasın.
+    # Batch render'ın sesi toplu istek parçası olabilir (bkz. 3c): API sesli render'a kopyalanmasın
+    suffix = f"#s{sentence_pause_ms}" if sentence_pause_ms is not None else ""
+    suffix += "#b" if batch else ""
+    return [_segment_key(text, vid) + suffix for text, vid in jobs]
+
+def _render_concat(
+    jobs: List[Tuple[str, str]], gap_ms: int, out_path: str, max_workers: int,
+    prev: Optional[Dict[str, Any]], progress: _ProgressTracker,
+    sentence_pause_ms: Optional[int] = None,
+    batch: bool = False,
+) -> Dict[str, Any]:
+    keys = _segment_keys(jobs, sentence_pause_ms, batch)
+    pause = sentence_pause_ms or 0
+
+    # Önceki çıktıdan kopyalanabilecek segmentler: anahtar → (byte offset, byte uzunluk)
+    reusable: Dict[str, Tuple[int, int]] = {}
+    prev_data = b""
+    if prev and prev.get("output_mode") == "concat":
+        reusable = {e["key"]: (e["byte_offset"], e["byte_length"]) for e in prev["segments"]}
+        if any(k in reusable for k in keys):
+            with open(out_path, "rb") as f:
+                prev_data = f.read()
+
+    todo = [i for i, k in enumerate(keys) if k not in reusable]
+    reused: Dict[int, Any] = {}
+    for i, k in enumerate(keys):
+        if k in reusable:
+            off, ln = reusable[k]
+            reused[i] = parse_mp3(prev_data[off:off + ln])
+    progress.start(reused)
+
+    parts = _synthesize_segments([jobs[i] for i in todo], max_workers, _tts_mp3,
+                                 on_done=lambda j, ps: progress.done(todo[j], _join_items(ps, pause)),
+                                 split_sentences=sentence_pause_ms is not None, batch=batch)
+    segments_out = dict(reused)
+    segments_out.update(zip(todo, (_join_items(ps, pause) for ps in parts)))
+
+    progress.phase("assemble")
+    items: List[Any] = [INTRO_MS]
+    for i in range(len(keys)):
+        items += [segments_out[i], gap_ms]
+    out = concat_mp3(items, out_path)
+
+    spf, sr = out.header.samples_per_frame, out.header.sample_rate
+    segs = []
+    sample_pos = 0
+    frame_offsets = [fo for fo, _ in out.frames]
+    f = 0
+    for idx, (off, ln) in enumerate(out.spans):
+        first = f
+        while f < len(frame_offsets) and frame_offsets[f] < off + ln:
+            f += 1
+        n_frames = f - first
+        if idx % 2 == 1:  # tek indeksler ses; çiftler intro/gap sessizliği
+            i = idx // 2
+            text, vid = jobs[i]
+            segs.append({
+                "key": keys[i], "voice_id": vid,
+                "text_sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+                "byte_offset": off, "byte_length": ln,
+                "sample_offset": sample_pos, "samples": n_frames * spf,
+                "duration_ms": round(n_frames * spf * 1000.0 / sr, 1),
+            })
+        sample_pos += n_frames * spf
+    return {
+        "output_mode": "concat", "intro_ms": INTRO_MS, "gap_ms": gap_ms,
+        "sample_rate": sr, "segments": segs,
+        "stats": {"reused": len(keys) - len(todo), "rendered": len(todo)},
+    }
+
+def _render_reencode(
+    jobs: List[Tuple[str, str]], gap_ms: int, out_path: str, max_workers: int,
+    prev: Optional[Dict[str, Any]], progress: _ProgressTracker,
+    sentence_pause_ms: Optional[int] = None,
+    batch: bool = False,
+) -> Dict[str, Any]:
+    keys = _segment_keys(jobs, sentence_pause_ms, batch)
+    pause = sentence_pause_ms or 0
+    before = set(e["key"] for e in prev["segments"]) if prev else set()
+
+    # ❗ Hata olursa exception fırlasın; 1 sn'lik boş dosya üretmeyelim
+    progress.start({})
+    results = _synthesize_segments(jobs, max_workers, _tts_with_path,
+                                   on_done=lambda i, res: progress.done(i, _join_items([p for p, _ in res], pause)),
+                                   split_sentences=sentence_pause_ms is not None, batch=batch)
+    clips = [_join_clips([clip for _, clip in res], pause) for res in results]
+
+    progress.phase("assemble")
+    final_audio, spans = _assemble(clips, gap_ms=gap_ms, intro_ms=INTRO_MS)
+    export_mp3(final_audio, out_path)
+
+    sr = final_audio.frame_rate
+    segs = []
+    for (text, vid), k, (off, n) in zip(jobs, keys, spans):
+        segs.append({
+            "key": k, "voice_id": vid,
+            "text_sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+            "sample_offset": off, "samples": n,
+            "duration_ms": round(n * 1000.0 / sr, 1),
+        })
+    reused = sum(1 for k in keys if k in before)
+    return {
+        "output_mode": "reencode", "intro_ms": INTRO_MS, "gap_ms": gap_ms,
+        "sample_rate": sr, "segments": segs,
+        "stats": {"reused": reused, "rendered": len(keys) - reused},
+    }
+
+# ------------------------------------------------------------
+# 9b) Akışlı (stream) render – bellek kullanımı podcast uzunluğundan bağımsız
+#     Worker'lar sadece cache dosyalarını üretir (PCM tutmaz). Script sırasıyla
+#     hazır olan her segment decode edilip TEK bir ffmpeg encoder sürecine
+#     stdin'den akıtılır ve hemen bırakılır; sentez sürerken encode de ilerler.
+#     Decode ortak PCM LRU'sunu (3b) atlar: saatlik bir render diğer oturumların
+#     sıcak kayıtlarını çıkarmaz ve bellekte aynı anda en fazla bir segmentin
+#     PCM'i durur.
+# ------------------------------------------------------------
+STREAM_BITRATE = "128k"
+_PIPE_CHUNK = 1 << 20
+
+class _PcmPipeEncoder:
+    def __init__(self, out_path: str, intro_ms: int, bitrate: str = STREAM_BITRATE):
+        self.out_path = out_path
+        self.tmp = out_path + ".part"
+        self.intro_ms = intro_ms
+        self.bitrate = bitrate
+        self.proc: Optional[subprocess.Popen] = None
+        self.frame_rate = self.channels = 0
+        self.frames = 0  # şimdiye kadar yazılan sample (frame) sayısı
+        self._err = None
+
+    def _start(self, clip: AudioSegment) -> None:
+        # Çıkış formatı ilk klipten; sonrakiler buna dönüştürülür
+        self.frame_rate, self.channels = clip.frame_rate, clip.channels
+        cmd = [
+            AudioSegment.converter, "-hide_banner", "-v", "error", "-y",
+            "-f", "s16le", "-ar", str(self.frame_rate), "-ac", str(self.channels), "-i", "pipe:0",
+            "-c:a", "libmp3lame", "-b:a", self.bitrate, "-f", "mp3", self.tmp,
+        ]
+        self._err = tempfile.TemporaryFile()  # PIPE dolup ffmpeg'i kilitlemesin
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._err)
+        self._silence(self.intro_ms)
+
+    def _write(self, data: bytes) -> None:
+        try:
+            self.proc.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            raise RuntimeError(f"ffmpeg encoder beklenmedik şekilde kapandı: {self._stderr()}")
+
+    def _silence(self, ms: int) -> None:
+        n = _silence_frames(ms, self.frame_rate)
+        self.frames += n
+        remaining = n * self.channels * 2
+        zeros = bytes(min(remaining, _PIPE_CHUNK))
+        while remaining > 0:
+            k = min(remaining, len(zeros))
+            self._write(zeros[:k])
+            remaining -= k
+
+    def _stderr(self) -> str:
+        if self._err is None:
+            return ""
+        self._err.seek(0)
+        return self._err.read().decode("utf-8", "replace").strip()
+
+    def write_clip(self, clip: AudioSegment, gap_ms: int) -> Tuple[int, int]:
+        """Klibi + arkasındaki boşluğu yazar; klibin (sample offset, sample sayısı) aralığını döner."""
+        if self.proc is None:
+            self._start(clip)
+        if clip.channels != self.channels:
+            clip = clip.set_channels(self.channels)
+        if clip.frame_rate != self.frame_rate:
+            clip = clip.set_frame_rate(self.frame_rate)
+        if clip.sample_width != 2:
+            clip = clip.set_sample_width(2)
+        data = clip.raw_data
+        start, n = self.frames, len(data) // (self.channels * 2)
+        self._write(data)
+        self.frames += n
+        self._silence(gap_ms)
+        return start, n
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg encode başarısız ({self.proc.returncode}): {self._stderr()}")
+        self._err.close()
+        os.replace(self.tmp, self.out_path)
+
+    def abort(self) -> None:
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self._err.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
+
+def _render_stream(
+    jobs: List[Tuple[str, str]], gap_ms: int, out_path: str, max_workers: int,
+    prev: Optional[Dict[str, Any]], progress: _ProgressTracker,
+    sentence_pause_ms: Optional[int] = None,
+    batch: bool = False,
+) -> Dict[str, Any]:
+    keys = _segment_keys(jobs, sentence_pause_ms, batch)
+    before = set(e["key"] for e in prev["segments"]) if prev else set()
+    pause = sentence_pause_ms or 0
+
+    encoder = _PcmPipeEncoder(out_path, INTRO_MS)
+    ready: Dict[int, List[str]] = {}
+    spans: List[Tuple[int, int]] = []
+
+    def _read(path: str, text: str, vid: str) -> AudioSegment:
+        # Worker bitirdikten sonra dosya silindiyse (elle temizlik) yeniden çöz/üret
+        try:
+            return decode_mp3(path)
+        except FileNotFoundError:
+            return _with_cached(text, vid, decode_mp3, accept_batch=batch)[1]
+
+    def _drain() -> None:
+        # Script sırasında baştan kesintisiz hazır olanları encoder'a ver
+        while len(spans) in ready:
+            i = len(spans)
+            paths = ready.pop(i)
+            text, vid = jobs[i]
+            texts = _split_sentences(text) if sentence_pause_ms is not None else [text]
+            clips = [_read(p, t, vid) for p, t in zip(paths, texts)]
+            spans.append(encoder.write_clip(_join_clips(clips, pause), gap_ms))
+
+    def _on_done(i: int, paths: List[str]) -> None:
+        ready[i] = paths
+        progress.done(i, _join_items(paths, pause))
+        _drain()
+
+    progress.start({})
+    try:
+        _synthesize_segments(jobs, max_workers, _tts_path, on_done=_on_done,
+                             split_sentences=sentence_pause_ms is not None, batch=batch)
+        progress.phase("assemble")
+        _drain()
+        encoder.close()
+    except BaseException:
+        encoder.abort()
+        raise
+
+    sr = encoder.frame_rate
+    segs = []
+    for (text, vid), k, (off, n) in zip(jobs, keys, spans):
+        segs.append({
+            "key": k, "voice_id": vid,
+            "text_sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+            "sample_offset": off, "samples": n,
+            "duration_ms": round(n * 1000.0 / sr, 1),
+        })
+    reused = sum(1 for k in keys if k in before)
+    return {
+        "output_mode": "stream", "intro_ms": INTRO_MS, "gap_ms": gap_ms,
+        "sample_rate": sr, "segments": segs,
+        "stats": {"reused": reused, "rendered": len(keys) - reused},
+    }
+
+# ------------------------------------------------------------
+# 10) ANA FONKSİYON – Podcast üret
+#    output_mode:
+#      "reencode" – klipler PCM'e açılır, birleştirilir, tekrar MP3'e encode edilir
+#      "concat"   – cache'teki MP3 frame'leri decode edilmeden uç uca eklenir
+#                   (sessizlikler hazır sessiz frame'ler; ikinci kayıplı encode yok)
+#      "stream"   – reencode ile aynı ses, ama PCM tek ffmpeg sürecine akıtılır;
+#                   saatlerce süren podcast'lerde bile bellek sabit kalır (bkz. 9b)
 # ------------------------------------------------------------
+OUTPUT_MODES = ("reencode", "concat", "stream")
+
 def generate_podcast(
     json_path: str,
     selected_speakers: Optional[List[str]] = None,
     gap_ms: int = 400,
     out_name: str = "podcast_final.mp3",
+    max_workers: int = TTS_MAX_WORKERS,
+    output_mode: str = "reencode",
+    incremental: bool = True,
+    on_progress: Optional[Callable[[RenderProgress], None]] = None,
+    preview_path: Optional[str] = None,
+    preview_interval_s: float = 10.0,
+    split_sentences: bool = False,
+    sentence_pause_ms: int = SENTENCE_PAUSE_MS,
+    batch_paragraphs: bool = False,
 ) -> str:
     """
     json_path: save_script_to_json tarafından üretilen dosya yolu
     selected_speakers: edit_page'de seçilen etiketler (max 4). None ise fallback kullanılır.
     gap_ms: paragraflar arası sessizlik
     out_name: çıktı dosyası adı
+    max_workers: paralel TTS isteği sayısı (1 = sıralı)
+    output_mode: "reencode", "concat" ya da "stream" (bkz. yukarı)
+    incremental: önceki çıktının manifest'ini kullanarak sadece değişenleri üret (bkz. 9)
+    on_progress: her segment bittikçe RenderProgress ile çağrılır (bkz. 8)
+    preview_path: verilirse bitmiş baş kısım bu MP3'e yazılır (en sık preview_interval_s'de bir)
+    split_sentences: paragrafları cümle cümle üret/cache'le, aralarına sentence_pause_ms koy (bkz. 6)
+    batch_paragraphs: aynı sesli ardışık paragrafları TTS_BATCH_MAX_CHARS'a kadar tek istekte üret (bkz. 3c)
     """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Bilinmeyen output_mode: {output_mode!r} (seçenekler: {', '.join(OUTPUT_MODES)})")
+    if TTS_BACKEND not in TTS_BACKENDS:
+        raise ValueError(f"Bilinmeyen TTS_BACKEND: {TTS_BACKEND!r} (seçenekler: {', '.join(TTS_BACKENDS)})")
+
     segments = _load_segments(json_path)
     voice_ids = _resolve_voice_ids(selected_speakers)
 
-    final_audio = AudioSegment.silent(duration=1000)  # 1 sn intro
-    added = 0
-
+    # Önce hangi paragraf hangi sesle okunacak, planı çıkar
+    jobs: List[Tuple[str, str]] = []
     for i, seg in enumerate(segments):
         text = (seg.get("text") or "").strip()
         if not text:
@@ -175,17 +1669,39 @@ def generate_podcast(
             vid = VOICE_MAP[spk_label]
         else:
             vid = voice_ids[i % len(voice_ids)]
+        jobs.append((text, vid))
 
-        # ❗ Hata olursa exception fırlasın; 1 sn'lik boş dosya üretmeyelim
-        clip = _tts(text, vid, model_id="eleven_turbo_v2")
-        final_audio += clip + AudioSegment.silent(duration=gap_ms)
-        added += 1
-
-    if added == 0:
+    if not jobs:
         raise RuntimeError("Hiçbir ses segmenti üretilmedi. (Boş script, eşleşmeyen speaker ya da TTS hatası).")
 
     out_path = os.path.join(os.getcwd(), out_name)
-    final_audio.export(out_path, format="mp3")
+    pause = sentence_pause_ms if split_sentences else None
+    fingerprint = _render_fingerprint(jobs, gap_ms=gap_ms, output_mode=output_mode,
+                                      sentence_pause_ms=pause, batch_paragraphs=batch_paragraphs)
+    prev = _load_manifest(out_path) if incremental else None
+
+    progress = _ProgressTracker(len(jobs), gap_ms, on_progress, preview_path, preview_interval_s)
+    # Girdi hiç değişmediyse (aynı butona iki kez basıldı) mevcut çıktı aynen döner
+    if prev and prev.get("fingerprint") == fingerprint:
+        progress.phase("done")
+        return out_path
+
+    # Çağıran bir kiracı belirlemediyse her render kendi kiracısıdır (adil paylaşım);
+    # birkaç segmentlik kısa render'lar uzunların önüne geçer
+    scope = nullcontext() if _tts_tenant() else tts_tenant(
+        f"render:{fingerprint[:12]}", "interactive" if len(jobs) <= TTS_SHORT_JOB_SEGMENTS else "bulk")
+    # websocket backend: ses başına bağlantılar render boyunca açık kalır, sonunda kapanır
+    with scope, _pin_render(), _ws_pool() if TTS_BACKEND == "websocket" else nullcontext():
+        if output_mode == "concat":
+            manifest = _render_concat(jobs, gap_ms, out_path, max_workers, prev, progress, pause, batch_paragraphs)
+        elif output_mode == "stream":
+            manifest = _render_stream(jobs, gap_ms, out_path, max_workers, prev, progress, pause, batch_paragraphs)
+        else:
+            manifest = _render_reencode(jobs, gap_ms, out_path, max_workers, prev, progress, pause, batch_paragraphs)
+    manifest["fingerprint"] = fingerprint
+    manifest["batch_paragraphs"] = batch_paragraphs
+    _write_manifest(out_path, manifest)
+    progress.phase("done")
     return out_path
 
     return output_path
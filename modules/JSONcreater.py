@@ -1,7 +1,6 @@
 def convert_text_to_json(input_path, output_path="output.json"):
     import json
     import os
-    from docx import Document
 
     def parse_script_lines(lines):
         """Turn raw lines into a list of {id, speaker, text} dicts."""
@@ -20,6 +19,7 @@ def convert_text_to_json(input_path, output_path="output.json"):
         return lines
 
     def read_docx(file_path):
+        from docx import Document  # only .docx needs python-docx
         doc = Document(file_path)
         paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
         return paragraphs
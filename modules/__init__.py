@@ -8,44 +8,44 @@ This module contains the core functionality for:
 - AI script generation with Gemini
 """
 
-# Import your existing modules
-try:
-    from . import JSONcreater
-    from . import FABA
-    from . import url_text_extractor
-    from . import gemini_generator
-    
-    # Import main functions for easy access
-    from .JSONcreater import convert_text_to_json
-    from .FABA import generate_podcast
-    from .url_text_extractor import convert_url_to_json
-    from .gemini_generator import generate_script_with_prompt
-    
-    __all__ = [
-        # Modules
-        'JSONcreater',
-        'FABA', 
-        'url_text_extractor',
-        'gemini_generator',
-        
-        # Main functions
-        'convert_text_to_json',
-        'generate_podcast',
-        'convert_url_to_json',
-        'generate_script_with_prompt'
-    ]
-    
-except ImportError as e:
-    print(f"Warning: Could not import some modules: {e}")
-    print("Make sure all your existing modules are in the modules/ directory")
-    
-    # Fallback - define what should be available
-    __all__ = [
-        'JSONcreater',
-        'FABA',
-        'url_text_extractor', 
-        'gemini_generator'
-    ]
+# Submodules and their main functions are imported lazily on first attribute
+# access (PEP 562), so "import modules" does not pull in pydub, requests,
+# bs4 or the Gemini SDK, and does not need any API key.
+import importlib
+
+_LAZY_FUNCTIONS = {
+    'convert_text_to_json': 'JSONcreater',
+    'generate_podcast': 'FABA',
+    'convert_url_to_json': 'url_text_extractor',
+    'generate_script_with_prompt': 'gemini_generator',
+}
+
+__all__ = [
+    # Modules
+    'JSONcreater',
+    'FABA',
+    'url_text_extractor',
+    'gemini_generator',
+
+    # Main functions
+    'convert_text_to_json',
+    'generate_podcast',
+    'convert_url_to_json',
+    'generate_script_with_prompt'
+]
+
+def __getattr__(name):
+    if name in _LAZY_FUNCTIONS:
+        value = getattr(importlib.import_module(f".{_LAZY_FUNCTIONS[name]}", __name__), name)
+    elif name in __all__:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 # Version info
 __version__ = '1.0.0'
@@ -0,0 +1,337 @@
+# modules/audio_cache.py
+# --- audio_cache/ için SQLite indeksli, boyut sınırlı LRU yönetimi ---
+#
+# Her cache dosyası için: boyut, son erişim, hit sayısı ve ses (voice_id).
+# Hit/miss kontrolü dosya sistemine dokunmadan indeksten cevaplanır;
+# toplam boyut bütçeyi aşınca en uzun süredir kullanılmayanlar silinir.
+# Aynı anahtar için eşzamanlı miss'ler singleflight() ile tek isteğe iner
+# (thread'ler arası kilit tablosu + süreçler arası dosya kilidi).
+# Süren bir render'ın kullandığı dosyalar pinned() ile tahliyeden korunur
+# (pins tablosu; süreçler arası geçerli).
+#
+# CLI:
+#   python -m modules.audio_cache report
+#   python -m modules.audio_cache prune --max-mb 200 [--dry-run]
+#   python -m modules.audio_cache reindex
+#   python -m modules.audio_cache migrate edited_script.json output.json
+#   python -m modules.audio_cache canon-report edited_script.json [--rules nfc,quotes]
+
+from __future__ import annotations
+import os, time, uuid, sqlite3, threading, argparse
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+try:  # Windows
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+INDEX_NAME = "index.sqlite3"
+DEFAULT_MAX_BYTES = int(os.getenv("FABA_CACHE_MAX_MB", "1024")) * 1024 * 1024
+# Render sırasında yeni erişilmiş bir segment, birleştirme bitmeden silinmesin
+EVICT_GRACE_S = 300
+# pinned() kaydı en fazla bu kadar geçerli (süreç çökerse kayıt sonsuza dek kalmasın)
+PIN_TTL_S = 24 * 3600
+LOCK_DIR = ".locks"
+
+# Süreç içi kilit tablosu: tam yol -> [Lock, bekleyen sayısı]
+_inflight: Dict[str, list] = {}
+_inflight_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name        TEXT PRIMARY KEY,
+    voice_id    TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created     REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);
+CREATE TABLE IF NOT EXISTS pins (
+    name        TEXT NOT NULL,
+    holder      TEXT NOT NULL,
+    expires     REAL NOT NULL,
+    PRIMARY KEY (name, holder)
+);
+"""
+
+
+def _voice_of(name: str) -> str:
+    return name.split("_", 1)[0]
+
+
+def _lock_file(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        fh.seek(0)
+        while True:
+            try:
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK ~10 sn deneyip vazgeçer; tekrar bekle
+                continue
+    # ikisi de yoksa yalnızca süreç içi kilit geçerli
+
+
+def _unlock_file(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CacheIndex:
+    """
+    audio_cache/ klasörünün SQLite indeksi. Thread-safe; birden fazla süreç
+    aynı dosyayı WAL modunda paylaşabilir.
+    Anahtar = cache dosyasının adı (ör. {voice_id}_v2_{sha256}.mp3).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, INDEX_NAME), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        # İlk açılış: klasörde dosya var ama indeks boş → mevcut içeriği indeksle
+        if self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0:
+            self.reindex()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    # -------------------------
+    # Hit / miss / ekleme
+    # -------------------------
+    def lookup(self, name: str) -> bool:
+        """İndekste varsa hit sayar, son erişimi günceller ve True döner."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE entries SET hits = hits + 1, last_access = ? WHERE name = ?", (time.time(), name)
+            )
+            return cur.rowcount > 0
+
+    def add(self, name: str, size: Optional[int] = None) -> None:
+        """Yeni (ya da indekste olmayan) bir dosyayı kaydeder ve bütçeyi uygular."""
+        if size is None:
+            size = os.path.getsize(self.path(name))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO entries (name, voice_id, size, created, last_access, hits) VALUES (?, ?, ?, ?, ?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+                (name, _voice_of(name), size, now, now),
+            )
+        self.evict()
+
+    @contextmanager
+    def singleflight(self, name: str) -> Iterator[None]:
+        """
+        Aynı cache dosyasını üretmek isteyen herkesi sıraya sokar: önce süreç
+        içi kilit (aynı süreçteki thread'ler dosya kilidine hiç gitmez), sonra
+        {cache_dir}/.locks/{name}.lock üzerinde süreçler arası kilit.
+        Kilidi alan, dosyanın bu arada üretilip üretilmediğine tekrar bakmalı.
+        Kilit dosyaları silinmez (silmek, bekleyen birinin başka inode'u
+        kilitlemesine yol açar); boş ve küçüktürler.
+        """
+        key = self.path(name)
+        with _inflight_lock:
+            entry = _inflight.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                lock_dir = os.path.join(self.cache_dir, LOCK_DIR)
+                os.makedirs(lock_dir, exist_ok=True)
+                with open(os.path.join(lock_dir, name + ".lock"), "a+b") as fh:
+                    _lock_file(fh)
+                    try:
+                        yield
+                    finally:
+                        _unlock_file(fh)
+        finally:
+            with _inflight_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    _inflight.pop(key, None)
+
+    @contextmanager
+    def pinned(self, ttl_s: float = PIN_TTL_S) -> Iterator[Callable[[str], None]]:
+        """
+        Blok boyunca pin(name) ile işaretlenen dosyalar evict() tarafından
+        silinmez (grace süresini aşan uzun render'lar için). Çıkışta kayıtlar silinir.
+        """
+        holder = f"{os.getpid()}:{uuid.uuid4().hex}"
+        expires = time.time() + ttl_s
+        seen: set = set()
+
+        def pin(name: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            with self._lock:
+                self._db.execute("INSERT OR IGNORE INTO pins (name, holder, expires) VALUES (?, ?, ?)",
+                                 (name, holder, expires))
+
+        try:
+            yield pin
+        finally:
+            if seen:
+                with self._lock:
+                    self._db.execute("DELETE FROM pins WHERE holder = ?", (holder,))
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE name = ?", (name,))
+
+    # -------------------------
+    # LRU tahliye
+    # -------------------------
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes: Optional[int] = None, dry_run: bool = False, grace_s: float = EVICT_GRACE_S) -> List[str]:
+        """
+        Toplam boyut bütçenin altına inene kadar en eski erişilen dosyaları siler.
+        Son grace_s saniyede erişilenlere ve pinned() ile işaretlilere
+        dokunulmaz. Silinen adları döner.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        total = self.total_bytes()
+        if total <= budget:
+            return []
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM pins WHERE expires <= ?", (now,))
+            rows = self._db.execute(
+                "SELECT name, size FROM entries WHERE last_access < ? "
+                "AND name NOT IN (SELECT name FROM pins) ORDER BY last_access ASC",
+                (now - grace_s,),
+            ).fetchall()
+        victims: List[str] = []
+        for name, size in rows:
+            if total <= budget:
+                break
+            victims.append(name)
+            total -= size
+        if dry_run:
+            return victims
+        for name in victims:
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
+            self.forget(name)
+        return victims
+
+    # -------------------------
+    # Bakım / rapor
+    # -------------------------
+    def reindex(self) -> Dict[str, int]:
+        """Klasörü tarar: indekste olmayan dosyaları ekler, kaybolanları siler."""
+        on_disk: Dict[str, os.stat_result] = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3") and not entry.name.startswith("."):
+                on_disk[entry.name] = entry.stat()
+        with self._lock:
+            known = {r[0] for r in self._db.execute("SELECT name FROM entries")}
+            added = [n for n in on_disk if n not in known]
+            removed = [n for n in known if n not in on_disk]
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO entries (name, voice_id, size, created, last_access, hits) VALUES (?, ?, ?, ?, ?, 0)",
+                [(n, _voice_of(n), on_disk[n].st_size, on_disk[n].st_mtime, on_disk[n].st_mtime) for n in added],
+            )
+            self._db.executemany("DELETE FROM entries WHERE name = ?", [(n,) for n in removed])
+            self._db.execute("COMMIT")
+        return {"added": len(added), "removed": len(removed)}
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size, hits = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM entries"
+            ).fetchone()
+            by_voice = self._db.execute(
+                "SELECT voice_id, COUNT(*), SUM(size), SUM(hits) FROM entries GROUP BY voice_id ORDER BY SUM(size) DESC"
+            ).fetchall()
+        return {
+            "entries": count,
+            "bytes": size,
+            "hits": hits,
+            "max_bytes": self.max_bytes,
+            "by_voice": [
+                {"voice_id": v, "entries": c, "bytes": b, "hits": h} for v, c, b, h in by_voice
+            ],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.audio_cache", description="audio_cache/ kullanım raporu ve temizlik")
+    ap.add_argument("--dir", default="audio_cache", help="cache klasörü (varsayılan: audio_cache)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("report", help="boyut / hit / ses bazında özet")
+    p = sub.add_parser("prune", help="LRU ile bütçenin altına in")
+    p.add_argument("--max-mb", type=float, required=True)
+    p.add_argument("--dry-run", action="store_true")
+    sub.add_parser("reindex", help="indeksi klasörle eşitle")
+    m = sub.add_parser("migrate", help="eski {voice}_{md5}.mp3 dosyalarını yeni anahtarlara taşı")
+    m.add_argument("scripts", nargs="+", help="metinlerin okunacağı script JSON'ları")
+    c = sub.add_parser("canon-report", help="metin kanonikleştirmenin cache hit oranına etkisi")
+    c.add_argument("scripts", nargs="+", help="metinlerin okunacağı script JSON'ları")
+    c.add_argument("--rules", help="virgülle kurallar (varsayılan: FABA_TEXT_CANON)")
+    args = ap.parse_args(argv)
+
+    idx = CacheIndex(args.dir)
+    if args.cmd == "report":
+        r = idx.report()
+        print(f"{r['entries']} dosya, {_mb(r['bytes'])} / bütçe {_mb(r['max_bytes'])}, toplam {r['hits']} hit")
+        for v in r["by_voice"]:
+            print(f"  {v['voice_id']:<24} {v['entries']:>5} dosya  {_mb(v['bytes']):>10}  {v['hits']:>6} hit")
+    elif args.cmd == "prune":
+        victims = idx.evict(max_bytes=int(args.max_mb * 1024 * 1024), dry_run=args.dry_run, grace_s=0)
+        if args.dry_run:
+            print(f"Silinecek: {len(victims)} dosya")
+        else:
+            print(f"Silindi: {len(victims)} dosya; kalan {_mb(idx.total_bytes())}")
+    elif args.cmd == "reindex":
+        print(idx.reindex())
+    elif args.cmd == "migrate":
+        from . import FABA
+        FABA.CACHE_DIR = args.dir
+        print(FABA.migrate_legacy_cache(args.scripts))  # indeksi de günceller
+    elif args.cmd == "canon-report":
+        from . import FABA
+        FABA.CACHE_DIR = args.dir
+        rules = [r.strip() for r in args.rules.split(",") if r.strip()] if args.rules is not None else None
+        r = FABA.canonicalization_report(args.scripts, rules)
+        print(f"Kurallar: {', '.join(r['rules']) or '-'}")
+        print(f"{r['texts']} farklı metin → {r['canonical_texts']} kanonik metin")
+        print(f"{r['requests']} istek: ücretli {r['paid_raw']} → {r['paid_canon']}; "
+              f"hit oranı %{r['hit_rate_raw'] * 100:.1f} → %{r['hit_rate_canon'] * 100:.1f}")
+        print(f"Gereksiz kopya: {r['redundant_files']} dosya, {_mb(r['redundant_bytes'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+# modules/audio_codec.py
+# --- MP3 decode / encode için takılabilir codec katmanı ---
+#
+# pydub'ın AudioSegment.from_file / export çağrılarının her biri yeni bir
+# ffmpeg (ve ffprobe) süreci başlatıyor; kısa kliplerde süreç açmak
+# decode'un kendisinden pahalı. Burada iki backend var:
+#   "pyav"   – PyAV (libavcodec) ile süreç içinde decode/encode, fork yok
+#   "ffmpeg" – bugünkü yol: pydub + harici ffmpeg süreci
+# FABA_CODEC=auto (varsayılan) işlem başına ölçülen en hızlıyı seçer:
+#   decode → PyAV kuruluysa PyAV (klip başına fork yok, ~7x hızlı)
+#   encode → ffmpeg (PyAV wheel'lerindeki libmp3lame belirgin yavaş;
+#            render başına tek export'ta süreç açma maliyeti önemsiz)
+#
+# Karşılaştırma:
+#   python -m modules.audio_codec bench [dosya.mp3 ...] [-n 20]
+
+from __future__ import annotations
+import io, os, time, argparse
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from pydub import AudioSegment
+
+CODEC_BACKENDS = ("auto", "pyav", "ffmpeg")
+CODEC_BACKEND = os.getenv("FABA_CODEC", "auto")
+
+Source = Union[str, bytes]
+
+
+def _have_pyav() -> bool:
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_backend(name: Optional[str] = None, op: str = "decode") -> str:
+    name = name or CODEC_BACKEND
+    if name not in CODEC_BACKENDS:
+        raise ValueError(f"Bilinmeyen codec backend: {name!r} (seçenekler: {', '.join(CODEC_BACKENDS)})")
+    if name == "auto":
+        return "pyav" if op == "decode" and _have_pyav() else "ffmpeg"
+    if name == "pyav" and not _have_pyav():
+        raise RuntimeError("pyav codec backend'i için `pip install av` gerekli.")
+    return name
+
+
+# ------------------------------------------------------------
+# 1) ffmpeg (pydub) – klip başına bir süreç
+# ------------------------------------------------------------
+def _decode_ffmpeg(src: Source) -> AudioSegment:
+    return AudioSegment.from_file(io.BytesIO(src) if isinstance(src, bytes) else src, format="mp3")
+
+
+def _encode_ffmpeg(audio: AudioSegment, bitrate: str) -> bytes:
+    buf = io.BytesIO()
+    audio.export(buf, format="mp3", bitrate=bitrate)
+    return buf.getvalue()
+
+
+# ------------------------------------------------------------
+# 2) PyAV – süreç içinde
+# ------------------------------------------------------------
+_LAYOUTS = {1: "mono", 2: "stereo"}
+
+
+def _decode_pyav(src: Source) -> AudioSegment:
+    import av
+
+    with av.open(io.BytesIO(src) if isinstance(src, bytes) else src) as container:
+        stream = container.streams.audio[0]
+        channels = stream.channels
+        # Decoder çoğunlukla float planar verir; pydub'ın beklediği 16-bit interleaved'e çevir
+        resampler = av.AudioResampler(format="s16", layout=_LAYOUTS.get(channels, stream.layout.name), rate=stream.rate)
+        pcm = bytearray()
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                pcm += bytes(out.planes[0])[:out.samples * channels * 2]
+        for out in resampler.resample(None):
+            pcm += bytes(out.planes[0])[:out.samples * channels * 2]
+        rate = stream.rate
+    return AudioSegment(data=bytes(pcm), sample_width=2, frame_rate=rate, channels=channels)
+
+
+def _encode_pyav(audio: AudioSegment, bitrate: str) -> bytes:
+    import av
+
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    layout = _LAYOUTS.get(audio.channels)
+    if layout is None:
+        raise ValueError(f"Desteklenmeyen kanal sayısı: {audio.channels}")
+    frame_width = audio.channels * 2
+    data = audio.raw_data
+    step = 1152 * 8 * frame_width  # birkaç MP3 frame'i kadar PCM
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="mp3") as container:
+        stream = container.add_stream("libmp3lame", rate=audio.frame_rate, layout=layout)
+        stream.bit_rate = int(bitrate.rstrip("k")) * 1000
+        pts = 0
+        for i in range(0, len(data), step):
+            chunk = data[i:i + step]
+            samples = len(chunk) // frame_width
+            frame = av.AudioFrame(format="s16", layout=layout, samples=samples)
+            plane = frame.planes[0]
+            if plane.buffer_size == len(chunk):
+                plane.update(chunk)
+            else:  # hizalama için fazladan ayrılmış alan
+                memoryview(plane)[:len(chunk)] = chunk
+            frame.sample_rate = audio.frame_rate
+            frame.pts = pts
+            pts += samples
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+_DECODERS: Dict[str, Callable[[Source], AudioSegment]] = {"pyav": _decode_pyav, "ffmpeg": _decode_ffmpeg}
+_ENCODERS: Dict[str, Callable[[AudioSegment, str], bytes]] = {"pyav": _encode_pyav, "ffmpeg": _encode_ffmpeg}
+
+
+# ------------------------------------------------------------
+# 3) Dış arayüz
+# ------------------------------------------------------------
+def decode_mp3(src: Source, backend: Optional[str] = None) -> AudioSegment:
+    """MP3 dosya yolu ya da byte'larını AudioSegment'e açar."""
+    return _DECODERS[resolve_backend(backend)](src)
+
+
+def encode_mp3(audio: AudioSegment, bitrate: str = "128k", backend: Optional[str] = None) -> bytes:
+    """AudioSegment'i MP3 byte'larına encode eder."""
+    return _ENCODERS[resolve_backend(backend, "encode")](audio, bitrate)
+
+
+def export_mp3(audio: AudioSegment, out_path: str, bitrate: str = "128k", backend: Optional[str] = None) -> None:
+    data = encode_mp3(audio, bitrate, backend)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, out_path)
+
+
+# ------------------------------------------------------------
+# 4) Benchmark
+# ------------------------------------------------------------
+def bench(paths: List[str], n: int = 20, backends: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Her backend için saniyede decode / encode edilen klip sayısı."""
+    if backends is None:
+        backends = ["ffmpeg"] + (["pyav"] if _have_pyav() else [])
+    clips = [decode_mp3(p, "ffmpeg") for p in paths]
+    rows = []
+    for name in backends:
+        t = time.perf_counter()
+        for i in range(n):
+            decode_mp3(paths[i % len(paths)], name)
+        dec = n / (time.perf_counter() - t)
+        t = time.perf_counter()
+        for i in range(n):
+            encode_mp3(clips[i % len(clips)], "128k", name)
+        enc = n / (time.perf_counter() - t)
+        rows.append({"backend": name, "decode_per_s": dec, "encode_per_s": enc})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.audio_codec", description="MP3 codec backend'leri")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="backend'leri klip/sn olarak karşılaştır")
+    b.add_argument("files", nargs="*", help="MP3 klipler (varsayılan: audio_cache/ içinden ilk 10)")
+    b.add_argument("-n", type=int, default=20, help="backend başına klip sayısı")
+    args = ap.parse_args(argv)
+
+    files = args.files
+    if not files:
+        cache = "audio_cache"
+        files = sorted(os.path.join(cache, f) for f in os.listdir(cache) if f.endswith(".mp3"))[:10]
+    if not files:
+        ap.error("Klip bulunamadı; MP3 yolları verin.")
+    print(f"{len(files)} klip, backend başına {args.n} işlem "
+          f"(auto → decode: {resolve_backend('auto')}, encode: {resolve_backend('auto', 'encode')})")
+    for r in bench(files, args.n):
+        print(f"  {r['backend']:<8} decode {r['decode_per_s']:7.1f} klip/sn   encode {r['encode_per_s']:7.1f} klip/sn")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
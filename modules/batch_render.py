@@ -0,0 +1,269 @@
+# modules/batch_render.py
+# --- Streamlit olmadan toplu podcast render'ı (gece işleri için) ---
+#
+# main.py'deki adımların (metin/URL → JSON → [tema] → generate_podcast)
+# komut satırı karşılığı. Her iş ayrı bir süreçte çalışır; süreçler aynı
+# audio_cache'i paylaşır (aynı paragraf farklı işlerde de bir kez üretilir,
+# bkz. CacheIndex.singleflight). ElevenLabs hız/eşzamanlılık bütçesi hesap
+# başına olduğu için süreçlere bölünür.
+#
+#   python -m modules.batch_render scripts/ -o out/ -j 4
+#   python -m modules.batch_render jobs.jsonl -o out/ --voices "Rachel,Adam"
+#
+# Kaynak:
+#   - klasör: içindeki .txt / .docx / .json script'leri (her dosya bir iş)
+#   - manifest (.json liste ya da .jsonl): her satır bir iş
+#       {"url": "https://...", "theme": "...", "voices": ["Female – Rachel"], "name": "ep01"}
+#       {"path": "scripts/ep02.docx"}
+#     (göreli yollar manifest'in klasörüne göre)
+#
+# Çıktı (-o klasörü): <isim>.mp3, <isim>.result.json (iş sonucu ve süreler),
+# summary.json (tüm işler + toplamlar), work/ (ara JSON'lar). Aynı komutu
+# tekrar çalıştırmak yalnızca değişen/başarısız işleri yeniden üretir
+# (generate_podcast'in manifest parmak izi).
+
+from __future__ import annotations
+import os, re, sys, json, time, argparse, traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+SCRIPT_EXTS = (".txt", ".docx", ".json")
+STAGES = ("extract_s", "theme_s", "render_s", "total_s")
+
+
+# ------------------------------------------------------------
+# 1) İş listesi
+# ------------------------------------------------------------
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", text).strip("-")[:60] or "job"
+
+
+def load_jobs(source: str) -> List[Dict[str, Any]]:
+    """Klasör ya da manifest → [{"name", "path"|"url", "theme"?, "voices"?}, ...]"""
+    if os.path.isdir(source):
+        jobs = [{"path": os.path.join(source, f)} for f in sorted(os.listdir(source))
+                if os.path.splitext(f)[1].lower() in SCRIPT_EXTS]
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            if source.endswith(".jsonl"):
+                jobs = [json.loads(line) for line in f if line.strip()]
+            else:
+                jobs = json.load(f)
+        if not isinstance(jobs, list):
+            raise ValueError("Manifest bir iş listesi olmalı.")
+        base = os.path.dirname(os.path.abspath(source))
+        for job in jobs:
+            if not isinstance(job, dict) or not (job.get("url") or job.get("path")):
+                raise ValueError(f"Geçersiz manifest satırı (url ya da path gerekli): {job!r}")
+            if job.get("path"):
+                job["path"] = os.path.join(base, job["path"])
+
+    seen: Dict[str, int] = {}
+    for job in jobs:
+        name = _slug(job.get("name") or (os.path.splitext(os.path.basename(job["path"]))[0]
+                                         if job.get("path") else re.sub(r"^https?://", "", job["url"])))
+        seen[name] = seen.get(name, 0) + 1
+        job["name"] = name if seen[name] == 1 else f"{name}-{seen[name]}"
+    return jobs
+
+
+def resolve_voices(voices: Optional[List[str]]) -> Optional[List[str]]:
+    """'Female – Rachel', 'rachel' ya da voice ID → VOICE_MAP etiketi."""
+    if not voices:
+        return None
+    from .FABA import VOICE_MAP
+
+    labels = []
+    for v in voices:
+        v = v.strip()
+        match = [label for label, vid in VOICE_MAP.items()
+                 if v in (label, vid) or v.lower() == label.split("–")[-1].strip().lower()]
+        if not match:
+            raise ValueError(f"Bilinmeyen ses: {v!r} (seçenekler: {', '.join(VOICE_MAP)})")
+        labels.append(match[0])
+    return labels
+
+
+# ------------------------------------------------------------
+# 2) Tek iş (alt süreçte)
+# ------------------------------------------------------------
+def _plan_processes(requested: int, n_jobs: int) -> int:
+    """
+    Süreç sayısı: iş sayısını ve TTS eşzamanlılık bütçesini aşmaz. Her süreç
+    en az bir TTS slotu tuttuğu için bütçeden fazla süreç hesabın sınırını
+    aşardı; -j bu yüzden kısılır (stderr'e uyarı).
+    """
+    from .FABA import TTS_MAX_CONCURRENT
+
+    processes = max(1, min(requested, n_jobs or 1))
+    budget = max(1, TTS_MAX_CONCURRENT)
+    if processes > budget:
+        print(f"Uyarı: -j {requested} TTS eşzamanlılık bütçesini (FABA_TTS_CONCURRENCY={budget}) aşıyor; "
+              f"{budget} süreç kullanılacak.", file=sys.stderr)
+        processes = budget
+    return processes
+
+
+def _init_worker(cache_dir: Optional[str], processes: int) -> None:
+    from . import FABA
+
+    if cache_dir:
+        FABA.CACHE_DIR = cache_dir
+    # Hesap başına bütçe: her süreç payını alır (processes ≤ bütçe, bkz. _plan_processes)
+    FABA.configure_tts_scheduler(
+        rate_per_s=FABA.TTS_RATE_PER_S / processes if FABA.TTS_RATE_PER_S > 0 else 0,
+        max_concurrent=max(1, FABA.TTS_MAX_CONCURRENT // processes),
+    )
+
+
+def render_job(job: Dict[str, Any], out_dir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Kaynağı script'e çevirir, (varsa) temayı uygular, podcast'i üretir. Hata fırlatmaz; sonucu döner."""
+    name = job["name"]
+    work = os.path.join(out_dir, "work")
+    os.makedirs(work, exist_ok=True)
+    timings: Dict[str, float] = {}
+    result: Dict[str, Any] = {"name": name, "source": job.get("url") or job.get("path"), "status": "error"}
+    t0 = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        source_json = os.path.join(work, f"{name}.source.json")
+        if job.get("url"):
+            from .url_text_extractor import convert_url_to_json
+            json_path, paragraphs = convert_url_to_json(job["url"], output_path=source_json)
+        elif job["path"].lower().endswith(".json"):
+            json_path = job["path"]
+            with open(json_path, "r", encoding="utf-8") as f:
+                paragraphs = json.load(f)
+        else:
+            from .JSONcreater import convert_text_to_json
+            json_path, paragraphs = convert_text_to_json(job["path"], output_path=source_json)
+        timings["extract_s"] = time.perf_counter() - t
+
+        theme = job.get("theme") or options.get("theme")
+        if theme:
+            from .gemini_generator import generate_script_with_prompt
+            t = time.perf_counter()
+            paragraphs = generate_script_with_prompt(paragraphs, theme)
+            json_path = os.path.join(work, f"{name}.script.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(paragraphs, f, ensure_ascii=False, indent=2)  # save_script_to_json formatı
+            timings["theme_s"] = time.perf_counter() - t
+
+        from .FABA import generate_podcast
+        t = time.perf_counter()
+        out_path = generate_podcast(
+            json_path,
+            selected_speakers=resolve_voices(job.get("voices")) or options.get("voices"),
+            out_name=os.path.join(out_dir, f"{name}.mp3"),
+            max_workers=options["max_workers"],
+            output_mode=options["output_mode"],
+            incremental=not options["force"],
+            split_sentences=options["split_sentences"],
+            batch_paragraphs=options["batch_paragraphs"],
+        )
+        timings["render_s"] = time.perf_counter() - t
+        result.update(status="ok", output=out_path, bytes=os.path.getsize(out_path))
+    except Exception as e:
+        result.update(error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    timings["total_s"] = time.perf_counter() - t0
+    result["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    with open(os.path.join(out_dir, f"{name}.result.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+# ------------------------------------------------------------
+# 3) Toplu çalıştırma
+# ------------------------------------------------------------
+def run_batch(
+    jobs: List[Dict[str, Any]],
+    out_dir: str,
+    processes: int = 2,
+    cache_dir: Optional[str] = None,
+    on_result: Optional[Any] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """İşleri süreç havuzunda çalıştırır, summary.json yazar ve özeti döner."""
+    os.makedirs(out_dir, exist_ok=True)
+    processes = _plan_processes(processes, len(jobs))
+    t0 = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(cache_dir, processes)) as pool:
+        futures = {pool.submit(render_job, job, out_dir, options): job for job in jobs}
+        for fut in as_completed(futures):
+            try:
+                res = fut.result()
+            except Exception as e:  # alt süreç çöktü (BrokenProcessPool vb.)
+                job = futures[fut]
+                res = {"name": job["name"], "source": job.get("url") or job.get("path"),
+                       "status": "error", "error": f"{type(e).__name__}: {e}", "timings": {}}
+            results.append(res)
+            if on_result:
+                on_result(res, len(results), len(jobs))
+
+    order = {job["name"]: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["name"]])
+    stage_totals = {k: round(sum(r["timings"].get(k, 0.0) for r in results), 3)
+                    for k in STAGES if any(k in r["timings"] for r in results)}
+    summary = {
+        "jobs": len(results),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "processes": processes,
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "stage_totals_s": stage_totals,
+        "results": [{k: v for k, v in r.items() if k != "traceback"} for r in results],
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .FABA import OUTPUT_MODES, TTS_MAX_WORKERS
+
+    ap = argparse.ArgumentParser(prog="python -m modules.batch_render",
+                                 description="Script klasörünü ya da URL manifest'ini toplu podcast'e çevir")
+    ap.add_argument("source", help="script klasörü (.txt/.docx/.json) ya da manifest (.json/.jsonl)")
+    ap.add_argument("-o", "--out-dir", default="batch_out", help="çıktı klasörü (varsayılan: batch_out)")
+    ap.add_argument("-j", "--jobs", type=int, default=2, help="paralel süreç sayısı (varsayılan: 2)")
+    ap.add_argument("--workers", type=int, default=TTS_MAX_WORKERS, help="iş başına TTS worker sayısı")
+    ap.add_argument("--theme", help="manifest'te tema yoksa tüm işlere uygulanacak yeniden yazma talimatı")
+    ap.add_argument("--voices", help="virgülle ayrılmış sesler, ör. 'Rachel,Adam' (manifest'tekiler önceliklidir)")
+    ap.add_argument("--cache-dir", help="ortak audio cache klasörü (varsayılan: audio_cache)")
+    ap.add_argument("--output-mode", choices=OUTPUT_MODES, default="reencode")
+    ap.add_argument("--split-sentences", action="store_true", help="cümle başına cache")
+    ap.add_argument("--batch-paragraphs", action="store_true", help="aynı sesli ardışık paragrafları tek istekte üret")
+    ap.add_argument("--force", action="store_true", help="çıktı güncel olsa da yeniden render et")
+    args = ap.parse_args(argv)
+
+    try:
+        jobs = load_jobs(args.source)
+        voices = resolve_voices(args.voices.split(",")) if args.voices else None
+    except (OSError, ValueError) as e:
+        ap.error(str(e))
+    if not jobs:
+        ap.error(f"İş bulunamadı: {args.source}")
+
+    def _report(r: Dict[str, Any], done: int, total: int) -> None:
+        status = "ok " if r["status"] == "ok" else "ERR"
+        detail = r.get("output") if r["status"] == "ok" else r.get("error")
+        print(f"[{done}/{total}] {status} {r['name']:<30} {r['timings'].get('total_s', 0):7.1f} sn  {detail}", flush=True)
+
+    processes = _plan_processes(args.jobs, len(jobs))
+    print(f"{len(jobs)} iş, {processes} süreç → {args.out_dir}")
+    summary = run_batch(
+        jobs, args.out_dir, processes=processes, cache_dir=args.cache_dir, on_result=_report,
+        theme=args.theme, voices=voices, max_workers=args.workers, output_mode=args.output_mode,
+        split_sentences=args.split_sentences, batch_paragraphs=args.batch_paragraphs, force=args.force,
+    )
+    stages = "  ".join(f"{k[:-2]} {v:.1f} sn" for k, v in summary["stage_totals_s"].items())
+    print(f"Bitti: {summary['ok']} başarılı, {summary['failed']} hatalı, {summary['wall_s']:.1f} sn "
+          f"(toplam iş süresi: {stages})")
+    print(f"Özet: {os.path.join(args.out_dir, 'summary.json')}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,7 @@ from __future__ import annotations
 from typing import Any, List
 import os
 import re
-
-import google.generativeai as genai
+import threading
 
 # -----------------------------
 # Güvenli API anahtarı okuma
@@ -23,7 +22,18 @@ def _read_gemini_key() -> str:
         raise RuntimeError("GEMINI_API_KEY bulunamadı (env veya .streamlit/secrets.toml).")
     return key
 
-genai.configure(api_key=_read_gemini_key())
+# SDK ağır ve anahtar gerektiriyor: import/configure ilk üretim isteğinde yapılır
+_GENAI = None
+_GENAI_LOCK = threading.Lock()
+
+def _genai():
+    global _GENAI
+    with _GENAI_LOCK:
+        if _GENAI is None:
+            import google.generativeai as genai
+            genai.configure(api_key=_read_gemini_key())
+            _GENAI = genai
+        return _GENAI
 
 # -----------------------------
 # Yardımcılar: normalize/postprocess
@@ -93,7 +103,7 @@ def generate_script_with_prompt(paragraphs: Any, prompt: str) -> List[str]:
     )
 
     # 3) Gemini çağrısı
-    model = genai.GenerativeModel("models/gemini-2.5-flash")
+    model = _genai().GenerativeModel("models/gemini-2.5-flash")
     resp = model.generate_content(full_prompt)
     raw = (getattr(resp, "text", None) or "").strip()
 
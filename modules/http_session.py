@@ -0,0 +1,109 @@
+# modules/http_session.py
+# --- Tüm dış HTTP çağrıları için ortak, keep-alive'lı bağlantı havuzu ---
+#
+# requests.Session thread-safe değil; ama altındaki urllib3 havuzu öyle.
+# Bu yüzden her thread kendi Session'ını alır, hepsi AYNI HTTPAdapter'ı
+# (dolayısıyla aynı bağlantı havuzunu) paylaşır: TTS worker'ları her
+# segmentte yeniden TCP+TLS el sıkışması yapmaz.
+#
+# Ayarlar (ortam değişkeni):
+#   FABA_HTTP_POOL_CONNECTIONS  host başına ayrı havuz sayısı (varsayılan 8)
+#   FABA_HTTP_POOL_MAXSIZE      host başına açık tutulan bağlantı (varsayılan 16)
+#   FABA_HTTP_CONNECT_TIMEOUT   bağlantı zaman aşımı, sn (varsayılan 5)
+#   FABA_HTTP_READ_TIMEOUT      okuma zaman aşımı, sn (varsayılan 60)
+
+from __future__ import annotations
+import os, threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = int(os.getenv("FABA_HTTP_POOL_CONNECTIONS", "8"))
+POOL_MAXSIZE = int(os.getenv("FABA_HTTP_POOL_MAXSIZE", "16"))
+CONNECT_TIMEOUT = float(os.getenv("FABA_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("FABA_HTTP_READ_TIMEOUT", "60"))
+
+_lock = threading.Lock()
+_local = threading.local()
+_adapter: Optional[HTTPAdapter] = None
+_generation = 0  # configure() çağrılınca thread'lerin eski Session'ı bırakması için
+
+
+def timeouts(read: Optional[float] = None, connect: Optional[float] = None) -> Tuple[float, float]:
+    """requests'e verilecek (connect, read) zaman aşımı çifti."""
+    return (CONNECT_TIMEOUT if connect is None else connect, READ_TIMEOUT if read is None else read)
+
+
+def _shared_adapter() -> HTTPAdapter:
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            # Tekrar deneme FABA'daki zamanlayıcıda; burada yok (max_retries=0)
+            _adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        return _adapter
+
+
+def get_session() -> requests.Session:
+    """Çağıran thread'e ait, ortak havuza bağlı Session."""
+    s = getattr(_local, "session", None)
+    if s is None or getattr(_local, "generation", -1) != _generation:
+        adapter = _shared_adapter()
+        s = requests.Session()
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        _local.session, _local.generation = s, _generation
+    return s
+
+
+def configure(
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+) -> None:
+    """Havuz boyutlarını / zaman aşımlarını değiştirir; açık bağlantılar kapatılır."""
+    global POOL_CONNECTIONS, POOL_MAXSIZE, CONNECT_TIMEOUT, READ_TIMEOUT, _adapter, _generation
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if connect_timeout is not None:
+            CONNECT_TIMEOUT = connect_timeout
+        if read_timeout is not None:
+            READ_TIMEOUT = read_timeout
+        if _adapter is not None:
+            _adapter.close()
+        _adapter = None
+        _generation += 1
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Host başına bağlantı kullanım istatistiği:
+    - connections: açılan yeni bağlantı sayısı (el sıkışma)
+    - requests: gönderilen istek sayısı
+    - reused: requests - connections (keep-alive ile kazanılan)
+    """
+    with _lock:
+        adapter = _adapter
+    hosts = []
+    if adapter is not None:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+                "reused": max(0, pool.num_requests - pool.num_connections),
+            })
+    return {
+        "hosts": hosts,
+        "connections": sum(h["connections"] for h in hosts),
+        "requests": sum(h["requests"] for h in hosts),
+        "reused": sum(h["reused"] for h in hosts),
+    }
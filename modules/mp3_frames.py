@@ -0,0 +1,395 @@
+# modules/mp3_frames.py
+# --- MP3 frame seviyesinde birleştirme (decode/encode yok) ---
+#
+# audio_cache/ içindeki segmentler zaten MP3. Onları PCM'e açıp tekrar
+# encode etmek yerine frame'leri uç uca ekliyoruz; intro ve paragraf
+# arası boşluklar için elle üretilmiş "sessiz" MP3 frame'leri kullanılıyor.
+# Başa doğru frame sayısı / byte / TOC içeren bir Xing(Info)+LAME
+# etiketi yazılır ki oynatıcılar süreyi ve seek'i doğru hesaplasın.
+
+from __future__ import annotations
+import os, struct
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple, Union
+
+# ------------------------------------------------------------
+# 0) MPEG ses başlığı tabloları
+# ------------------------------------------------------------
+_V1, _V2, _V25 = 3, 2, 0  # header'daki version bitleri
+
+_BITRATES = {  # kbps, Layer III
+    _V1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    _V2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_BITRATES[_V25] = _BITRATES[_V2]
+
+_SAMPLE_RATES = {
+    _V1: [44100, 48000, 32000],
+    _V2: [22050, 24000, 16000],
+    _V25: [11025, 12000, 8000],
+}
+
+_MONO = 3  # channel mode
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int
+    protected: bool
+    bitrate_index: int
+    sr_index: int
+    padding: int
+    channel_mode: int
+
+    @property
+    def sample_rate(self) -> int:
+        return _SAMPLE_RATES[self.version][self.sr_index]
+
+    @property
+    def bitrate(self) -> int:
+        return _BITRATES[self.version][self.bitrate_index]
+
+    @property
+    def channels(self) -> int:
+        return 1 if self.channel_mode == _MONO else 2
+
+    @property
+    def samples_per_frame(self) -> int:
+        return 1152 if self.version == _V1 else 576
+
+    @property
+    def side_info_size(self) -> int:
+        if self.version == _V1:
+            return 17 if self.channel_mode == _MONO else 32
+        return 9 if self.channel_mode == _MONO else 17
+
+    @property
+    def frame_length(self) -> int:
+        coef = 144 if self.version == _V1 else 72
+        return coef * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def format_key(self) -> Tuple[int, int, int]:
+        """Frame'lerin uç uca eklenebilmesi için aynı olması gerekenler."""
+        return (self.version, self.sample_rate, self.channels)
+
+    def pack(self) -> bytes:
+        h = 0xFFE00000
+        h |= self.version << 19
+        h |= 1 << 17  # Layer III
+        h |= (0 if self.protected else 1) << 16
+        h |= self.bitrate_index << 12
+        h |= self.sr_index << 10
+        h |= self.padding << 9
+        h |= self.channel_mode << 6
+        return struct.pack(">I", h)
+
+
+def parse_header(b: bytes, pos: int) -> Optional[FrameHeader]:
+    """pos'ta geçerli bir MPEG Layer III başlığı varsa çözer, yoksa None."""
+    if pos + 4 > len(b) or b[pos] != 0xFF or (b[pos + 1] & 0xE0) != 0xE0:
+        return None
+    h = struct.unpack(">I", b[pos:pos + 4])[0]
+    version = (h >> 19) & 3
+    layer = (h >> 17) & 3
+    br_idx = (h >> 12) & 0xF
+    sr_idx = (h >> 10) & 3
+    if version == 1 or layer != 1 or br_idx in (0, 15) or sr_idx == 3:
+        return None  # rezerve / free-format / Layer III değil
+    return FrameHeader(
+        version=version,
+        protected=not ((h >> 16) & 1),
+        bitrate_index=br_idx,
+        sr_index=sr_idx,
+        padding=(h >> 9) & 1,
+        channel_mode=(h >> 6) & 3,
+    )
+
+# ------------------------------------------------------------
+# 1) MP3 okuma – ID3 atla, Xing/Info/LAME etiketini ayıkla
+# ------------------------------------------------------------
+@dataclass
+class Mp3Stream:
+    data: bytes
+    frames: List[Tuple[int, int]] = field(default_factory=list)  # (offset, length)
+    header: Optional[FrameHeader] = None  # ilk ses frame'inin başlığı
+    encoder: bytes = b""
+    delay: int = 0    # LAME encoder delay (sample)
+    padding: int = 0  # LAME sondaki padding (sample)
+    # concat_mp3 çıktısında: her girdi item'ının dosyadaki (byte offset, byte uzunluk) aralığı
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.frames)
+
+    @property
+    def num_samples(self) -> int:
+        return self.num_frames * self.header.samples_per_frame if self.header else 0
+
+    @property
+    def duration_ms(self) -> float:
+        if not self.header:
+            return 0.0
+        return self.num_samples * 1000.0 / self.header.sample_rate
+
+    def iter_frames(self):
+        mv = memoryview(self.data)
+        for off, ln in self.frames:
+            yield mv[off:off + ln]
+
+
+def _skip_id3v2(b: bytes) -> int:
+    if len(b) >= 10 and b[:3] == b"ID3":
+        size = (b[6] & 0x7F) << 21 | (b[7] & 0x7F) << 14 | (b[8] & 0x7F) << 7 | (b[9] & 0x7F)
+        footer = 10 if b[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _xing_offset(hdr: FrameHeader) -> int:
+    return 4 + (2 if hdr.protected else 0) + hdr.side_info_size
+
+
+def _read_info_tag(stream: Mp3Stream, off: int, hdr: FrameHeader) -> bool:
+    """Frame bir Xing/Info/VBRI etiketiyse True döner ve LAME bilgisini okur."""
+    b = stream.data
+    x = off + _xing_offset(hdr)
+    if b[off + 36:off + 40] == b"VBRI":
+        return True
+    if b[x:x + 4] not in (b"Xing", b"Info"):
+        return False
+    flags = struct.unpack(">I", b[x + 4:x + 8])[0]
+    lame = x + 8 + (4 if flags & 1 else 0) + (4 if flags & 2 else 0) + (100 if flags & 4 else 0) + (4 if flags & 8 else 0)
+    if lame + 24 <= off + hdr.frame_length:
+        stream.encoder = bytes(b[lame:lame + 9])
+        d = b[lame + 21:lame + 24]
+        stream.delay = (d[0] << 4) | (d[1] >> 4)
+        stream.padding = ((d[1] & 0x0F) << 8) | d[2]
+    return True
+
+
+def parse_mp3(data: bytes) -> Mp3Stream:
+    """Ham MP3 byte'larını frame listesine ayırır. Geçerli frame yoksa ValueError."""
+    stream = Mp3Stream(data=data)
+    pos = _skip_id3v2(data)
+    end = len(data)
+    first = True
+    while pos + 4 <= end:
+        hdr = parse_header(data, pos)
+        if hdr is None or pos + hdr.frame_length > end:
+            if data[pos:pos + 3] == b"TAG":  # ID3v1 – dosya sonu
+                break
+            pos += 1  # senkron kaybı – bir sonraki 0xFF'e kay
+            continue
+        if first:
+            first = False
+            if _read_info_tag(stream, pos, hdr):
+                pos += hdr.frame_length
+                continue
+        if stream.header is None:
+            stream.header = hdr
+        elif hdr.format_key != stream.header.format_key:
+            raise ValueError("MP3 akışı içinde format değişiyor (sample rate / kanal).")
+        stream.frames.append((pos, hdr.frame_length))
+        pos += hdr.frame_length
+    if not stream.frames:
+        raise ValueError("Geçerli MP3 frame'i bulunamadı.")
+    return stream
+
+
+def read_mp3(path: str) -> Mp3Stream:
+    with open(path, "rb") as f:
+        return parse_mp3(f.read())
+
+
+PROBE_BYTES = 8192
+
+
+def probe_mp3(path: str, limit: int = PROBE_BYTES) -> FrameHeader:
+    """
+    Dosyanın (ID3'ten sonraki) ilk `limit` byte'ında geçerli bir ses frame'i
+    arar; bütün dosyayı okumadan "bu gerçekten MP3 mü" kontrolü. Frame,
+    ardından gelen başlıkla (ya da dosya sonuyla) doğrulanır. Yoksa ValueError.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = _skip_id3v2(f.read(10))
+        f.seek(start)
+        b = f.read(limit)
+    for pos in range(max(0, len(b) - 3)):
+        hdr = parse_header(b, pos)
+        if hdr is None:
+            continue
+        nxt = pos + hdr.frame_length
+        if start + nxt == size or parse_header(b, nxt) is not None:
+            return hdr
+    raise ValueError(f"İlk {limit} byte içinde geçerli MP3 frame'i bulunamadı.")
+
+# ------------------------------------------------------------
+# 2) Sessiz frame + Xing/LAME etiketi üretimi
+#    Side-info tamamen sıfır olan bir Layer III frame'i
+#    (part2_3_length = 0, global_gain = 0) her decoder'da sessizlik verir.
+# ------------------------------------------------------------
+def _tag_header(template: FrameHeader, min_len: int) -> FrameHeader:
+    """Şablonla aynı formatta, en az min_len byte'lık CRC'siz bir başlık."""
+    for idx in [template.bitrate_index] + list(range(1, 15)):
+        hdr = FrameHeader(template.version, False, idx, template.sr_index, 0, template.channel_mode)
+        if hdr.frame_length >= min_len:
+            return hdr
+    raise ValueError("Bu format için Xing etiketi sığmıyor.")
+
+
+def silent_frame(template: FrameHeader) -> bytes:
+    hdr = FrameHeader(template.version, False, template.bitrate_index, template.sr_index, 0, template.channel_mode)
+    return hdr.pack() + bytes(hdr.frame_length - 4)
+
+
+def silence_frame_count(ms: int, template: FrameHeader) -> int:
+    return int(round(max(ms, 0) * template.sample_rate / 1000.0 / template.samples_per_frame))
+
+
+def _crc16(data: bytes) -> int:
+    """LAME etiketinde kullanılan CRC-16 (poly 0x8005, reflected)."""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def build_info_frame(
+    template: FrameHeader,
+    frame_lengths: Sequence[int],
+    cbr: bool,
+    encoder: bytes = b"",
+    delay: int = 0,
+    padding: int = 0,
+) -> bytes:
+    """Xing/Info + LAME etiket frame'i (frames, bytes, TOC, delay/padding, etiket CRC'si)."""
+    xoff = 4 + template.side_info_size  # etiket frame'i CRC'siz
+    hdr = _tag_header(template, xoff + 120 + 36)
+    size = hdr.frame_length
+    total = size + sum(frame_lengths)
+    n = len(frame_lengths)
+
+    # TOC: dosyanın %i noktasına karşılık gelen byte konumu (0..255 ölçekli)
+    toc = bytearray(100)
+    offsets = []
+    acc = size
+    for ln in frame_lengths:
+        offsets.append(acc)
+        acc += ln
+    for i in range(100):
+        j = min(n - 1, i * n // 100) if n else 0
+        toc[i] = min(255, 256 * (offsets[j] if n else 0) // total)
+
+    frame = bytearray(size)
+    frame[0:4] = hdr.pack()
+    x = xoff
+    frame[x:x + 4] = b"Info" if cbr else b"Xing"
+    struct.pack_into(">IIII", frame, x + 4, 0x0F, n, total, 0)  # flags, frames, bytes ...
+    frame[x + 16:x + 116] = toc
+    struct.pack_into(">I", frame, x + 116, 0)  # quality
+    L = x + 120
+    enc = (encoder or b"LAME3.100")[:9].ljust(9, b"\0")
+    frame[L:L + 9] = enc
+    frame[L + 9] = 1 if cbr else 0  # tag revision 0, VBR method (1 = CBR)
+    if cbr:
+        frame[L + 20] = min(255, template.bitrate)
+    delay, padding = min(max(delay, 0), 0xFFF), min(max(padding, 0), 0xFFF)
+    frame[L + 21:L + 24] = bytes([delay >> 4, ((delay & 0xF) << 4) | (padding >> 8), padding & 0xFF])
+    struct.pack_into(">I", frame, L + 28, total)           # music length
+    # L+32: music CRC – decoder'lar doğrulamıyor; tüm gövdeyi Python'da
+    # CRC'lemek render'ı diskten yavaş yapacağı için 0 bırakılıyor.
+    struct.pack_into(">H", frame, L + 34, _crc16(bytes(frame[:190])))  # etiket CRC
+    return bytes(frame)
+
+# ------------------------------------------------------------
+# 3) Birleştirme
+#    items: MP3 dosya yolu (str) ya da milisaniye cinsinden sessizlik (int)
+# ------------------------------------------------------------
+Part = Union[str, int, Mp3Stream]
+Item = Union[Part, Sequence[Part]]  # liste/tuple: tek span'de birleşen grup (ör. cümleler + aralar)
+
+
+def concat_mp3(items: Sequence[Item], out_path: str) -> Mp3Stream:
+    """
+    Verilen MP3'leri ve sessizlikleri frame seviyesinde birleştirip
+    out_path'e yazar. Tüm parçaların MPEG sürümü, sample rate'i ve
+    kanal sayısı aynı olmalı; aksi halde ValueError.
+    Dönen Mp3Stream çıktı dosyasının özetidir (frames, header, delay...);
+    spans her üst düzey item için bir (byte offset, uzunluk) içerir.
+    """
+    groups: List[List[Union[Mp3Stream, int]]] = []
+    template: Optional[FrameHeader] = None
+    for it in items:
+        group: List[Union[Mp3Stream, int]] = []
+        for part in (it if isinstance(it, (list, tuple)) else [it]):
+            if isinstance(part, int):
+                group.append(part)
+                continue
+            st = part if isinstance(part, Mp3Stream) else read_mp3(part)
+            if template is None:
+                template = st.header
+            elif st.header.format_key != template.format_key:
+                raise ValueError(
+                    f"MP3 formatları uyuşmuyor: {template.format_key} != {st.header.format_key}. "
+                    "Frame birleştirme için tüm segmentler aynı output_format ile üretilmeli."
+                )
+            group.append(st)
+        groups.append(group)
+    streams = [p for g in groups for p in g]
+    if template is None:
+        raise ValueError("Birleştirilecek MP3 segmenti yok.")
+
+    silence = silent_frame(template)
+    chunks: List[bytes] = []
+    lengths: List[int] = []
+    bitrates = set()
+    spans: List[Tuple[int, int]] = []  # gövdeye göre; info frame boyu sonra eklenir
+    body_pos = 0
+    for group in groups:
+        start = body_pos
+        for part in group:
+            if isinstance(part, int):
+                k = silence_frame_count(part, template)
+                chunks.extend([silence] * k)
+                lengths.extend([len(silence)] * k)
+                bitrates.add(template.bitrate_index)
+                body_pos += k * len(silence)
+            else:
+                for off, ln in part.frames:
+                    chunks.append(part.data[off:off + ln])
+                    lengths.append(ln)
+                    bitrates.add(parse_header(part.data, off).bitrate_index)
+                    body_pos += ln
+        spans.append((start, body_pos - start))
+
+    mp3s = [p for p in streams if isinstance(p, Mp3Stream)]
+    # Gapless bilgisi: baştaki/sondaki parça gerçek ses ise onun delay/padding'i geçerli
+    delay = streams[0].delay if isinstance(streams[0], Mp3Stream) else 0
+    padding = streams[-1].padding if isinstance(streams[-1], Mp3Stream) else 0
+
+    body = b"".join(chunks)
+    info = build_info_frame(
+        template, lengths,
+        cbr=len(bitrates) == 1,
+        encoder=mp3s[0].encoder,
+        delay=delay, padding=padding,
+    )
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(info)
+        f.write(body)
+    os.replace(tmp, out_path)
+
+    out = Mp3Stream(data=b"", header=template, encoder=mp3s[0].encoder, delay=delay, padding=padding)
+    out.spans = [(len(info) + off, ln) for off, ln in spans]
+    pos = len(info)
+    for ln in lengths:
+        out.frames.append((pos, ln))
+        pos += ln
+    return out
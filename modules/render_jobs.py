@@ -0,0 +1,273 @@
+# modules/render_jobs.py
+# --- Streamlit script çalışmasından bağımsız, süreç içi render kuyruğu ---
+#
+# generate_podcast Streamlit rerun'ı içinde senkron çalışınca sayfa değişimi,
+# tarayıcının yeniden bağlanması ya da kesilen bir run tüm işi çöpe atıyordu.
+# Burada render'lar süreç genelinde tek bir kuyruğa gönderilir:
+#   job_id = submit(json_path, ...)   → hemen döner
+#   get(job_id)                       → durum + son RenderProgress (anlık kopya)
+# Kuyruk modül seviyesinde yaşar (sys.modules), yani rerun'lardan ve
+# oturumlardan etkilenmez; sayfa sadece job_id'yi session_state'te tutar.
+#
+# - Her iş bir "sahip"e (owner: Streamlit oturumu) aittir. Sahibin çıktısı
+#   SABİT bir yoldadır (RENDER_DIR/<owner>.mp3 + manifest + önizleme):
+#   düzenle-üret döngüsünde generate_podcast önceki manifest'i bulur
+#   (artımlı birleştirme, parmak izi kısayolu) ve diskte dosya birikmez.
+# - Aynı sahip aynı script + ayarlarla tekrar gönderirse yeni iş açılmaz,
+#   sahibin son işi bekliyor/çalışıyor/bitmişse onun ID'si döner. Yeni bir
+#   iş, sahibin sırada bekleyen eski işlerini iptal eder; aynı sahibin
+#   işleri (aynı çıktı dosyası) hiçbir zaman eşzamanlı çalışmaz: sahibin
+#   bir işi çalışırken gelen en yeni iş havuz DIŞINDA tutulur ve o iş
+#   bitince havuza girer (bekleyen iş worker slotu işgal etmez).
+# - Aynı anda çalışan render sayısı sınırlı (FABA_RENDER_JOBS, varsayılan 2);
+#   fazlası sırada bekler.
+# - Script içeriği gönderimde RENDER_DIR'e kopyalanır (iş bitince silinir):
+#   başka bir oturum edited_script.json'ı üzerine yazsa bile iş kendi
+#   kopyasını render eder.
+
+from __future__ import annotations
+import os, json, time, uuid, hashlib, threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+RENDER_DIR = "renders"
+RENDER_MAX_JOBS = int(os.getenv("FABA_RENDER_JOBS", "2"))
+RENDER_KEEP_JOBS = 200  # bellekte tutulan bitmiş iş sayısı (eskiler unutulur)
+
+JOB_STATES = ("queued", "running", "done", "error", "cancelled")
+
+
+@dataclass
+class RenderJob:
+    id: str
+    key: str                           # sahip + script + ayar özeti (dedupe anahtarı)
+    owner: str
+    status: str                        # JOB_STATES
+    out_path: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Any = None               # son FABA.RenderProgress
+    preview_path: Optional[str] = None # en son güncellenen önizleme dosyası
+    result: Optional[str] = None       # bitmiş MP3 yolu
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+
+def _job_key(owner: str, script: bytes, options: Dict[str, Any]) -> str:
+    h = hashlib.sha256(owner.encode("utf-8") + b"\0" + script)
+    h.update(json.dumps(options, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderQueue:
+    """Sınırlı sayıda worker thread'le render işlerini çalıştıran kuyruk."""
+
+    def __init__(self, max_jobs: int = RENDER_MAX_JOBS, render_dir: str = RENDER_DIR):
+        self.max_jobs = max(1, max_jobs)
+        self.render_dir = render_dir
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, RenderJob]" = OrderedDict()
+        self._latest: Dict[str, str] = {}  # sahip → son gönderilen işin ID'si
+        self._active: Dict[str, str] = {}  # sahip → havuzdaki (sırada/çalışan) işin ID'si
+        self._held: Dict[str, Tuple[RenderJob, Dict[str, Any]]] = {}  # sahip → havuz dışında bekleyen en yeni iş
+        self._futures: Dict[str, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="faba-render")
+
+    def _paths(self, owner: str) -> Dict[str, str]:
+        base = os.path.abspath(os.path.join(self.render_dir, owner))
+        return {"out": base + ".mp3", "manifest": base + ".mp3.manifest.json", "preview": base + ".preview.mp3"}
+
+    def submit(self, json_path: str, owner: str = "default", **options: Any) -> str:
+        """
+        Render'ı kuyruğa ekler, job ID döner. owner: çıktının sabit yolu ve
+        dedupe kapsamı (Streamlit'te oturum başına bir ID). options
+        generate_podcast'e aynen geçer (out_name / on_progress / preview_path
+        hariç; onları kuyruk belirler).
+        """
+        for k in ("out_name", "on_progress", "preview_path"):
+            if k in options:
+                raise ValueError(f"{k} render kuyruğu tarafından belirlenir.")
+        if not owner or os.path.basename(owner) != owner or owner.startswith("."):
+            raise ValueError(f"Geçersiz owner: {owner!r}")
+        with open(json_path, "rb") as f:
+            script = f.read()
+        key = _job_key(owner, script, options)
+
+        with self._lock:
+            latest = self._jobs.get(self._latest.get(owner, ""))
+            if latest is not None and latest.key == key and (
+                latest.status in ("queued", "running")
+                or (latest.status == "done" and latest.result and os.path.exists(latest.result))
+            ):
+                return latest.id
+            self._supersede(owner)
+
+            os.makedirs(self.render_dir, exist_ok=True)
+            job_id = uuid.uuid4().hex[:12]
+            with open(self._snapshot(job_id), "wb") as f:
+                f.write(script)
+            job = RenderJob(id=job_id, key=key, owner=owner, status="queued",
+                            out_path=self._paths(owner)["out"], submitted_at=time.time())
+            self._jobs[job.id] = job
+            self._latest[owner] = job.id
+            self._evict()
+            if owner in self._active:
+                self._held[owner] = (job, options)  # sahibin çalışan işi bitince havuza girer
+            else:
+                self._start(job, options)
+        return job.id
+
+    def _start(self, job: RenderJob, options: Dict[str, Any]) -> None:
+        # _lock tutulurken çağrılır
+        self._active[job.owner] = job.id
+        self._futures[job.id] = self._pool.submit(self._run, job, options)
+
+    def _supersede(self, owner: str) -> None:
+        # _lock tutulurken çağrılır: sahibin henüz başlamamış işleri artık gereksiz
+        # (aynı dosyaya yazacaklardı); çalışan iş durdurulamaz, bitmesi beklenir
+        held = self._held.pop(owner, None)
+        if held is not None:
+            self._mark_cancelled(held[0])
+        job = self._jobs.get(self._active.get(owner, ""))
+        if job is not None and job.status == "queued" and self._futures[job.id].cancel():
+            del self._active[owner]
+            self._mark_cancelled(job)
+
+    def _mark_cancelled(self, job: RenderJob) -> None:
+        job.status, job.finished_at = "cancelled", time.time()
+        self._discard_snapshot(job.id)
+
+    def _snapshot(self, job_id: str) -> str:
+        return os.path.join(self.render_dir, f".{job_id}.json")
+
+    def _discard_snapshot(self, job_id: str) -> None:
+        try:
+            os.unlink(self._snapshot(job_id))
+        except OSError:
+            pass
+
+    def _run(self, job: RenderJob, options: Dict[str, Any]) -> None:
+        try:
+            self._render(job, options)
+        finally:
+            self._discard_snapshot(job.id)
+            with self._lock:
+                if self._active.get(job.owner) == job.id:
+                    del self._active[job.owner]
+                held = self._held.pop(job.owner, None)
+                if held is not None:
+                    try:
+                        self._start(*held)
+                    except RuntimeError:  # kuyruk kapatıldı
+                        self._mark_cancelled(held[0])
+
+    def _render(self, job: RenderJob, options: Dict[str, Any]) -> None:
+        from .FABA import generate_podcast
+
+        with self._lock:
+            job.status, job.started_at = "running", time.time()
+
+        def _on_progress(p: Any) -> None:
+            with self._lock:
+                job.progress = p
+                if p.prefix_path:
+                    job.preview_path = p.prefix_path
+
+        try:
+            result = generate_podcast(self._snapshot(job.id), out_name=job.out_path, on_progress=_on_progress,
+                                      preview_path=self._paths(job.owner)["preview"], **options)
+        except Exception as e:
+            with self._lock:
+                job.status, job.error, job.finished_at = "error", str(e), time.time()
+            return
+        with self._lock:
+            job.status, job.result, job.finished_at = "done", result, time.time()
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        """İşin anlık kopyası (worker thread'i güncellemeye devam eder)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job is not None else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Henüz başlamamış işi iptal eder; çalışan iş durdurulamaz."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            held = self._held.get(job.owner)
+            if held is not None and held[0] is job:
+                del self._held[job.owner]
+            else:
+                fut = self._futures.get(job_id)
+                if fut is None or not fut.cancel():
+                    return False
+                if self._active.get(job.owner) == job_id:
+                    del self._active[job.owner]
+            self._mark_cancelled(job)
+            return True
+
+    def jobs(self) -> List[RenderJob]:
+        with self._lock:
+            return [replace(j) for j in self._jobs.values()]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {s: 0 for s in JOB_STATES}
+            for j in self._jobs.values():
+                counts[j.status] += 1
+        counts["max_jobs"] = self.max_jobs
+        return counts
+
+    def _evict(self) -> None:
+        # _lock tutulurken çağrılır; en eski bitmiş işler unutulur. Sahibin son
+        # işi de unutulduysa (oturum çoktan bitmiş) sabit çıktı dosyaları silinir.
+        finished = [j for j in self._jobs.values() if j.finished]
+        for j in finished[:max(0, len(finished) - RENDER_KEEP_JOBS)]:
+            del self._jobs[j.id]
+            self._futures.pop(j.id, None)
+            if self._latest.get(j.owner) == j.id:
+                del self._latest[j.owner]
+                for path in self._paths(j.owner).values():
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            for job, _ in self._held.values():
+                self._mark_cancelled(job)
+            self._held.clear()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            for job_id, fut in self._futures.items():
+                if fut.cancelled() and self._jobs[job_id].status == "queued":
+                    self._mark_cancelled(self._jobs[job_id])
+
+
+_QUEUE: Optional[RenderQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue() -> RenderQueue:
+    """Süreç genelindeki render kuyruğu (ilk kullanımda kurulur)."""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = RenderQueue()
+        return _QUEUE
+
+
+def submit(json_path: str, **options: Any) -> str:
+    return get_queue().submit(json_path, **options)
+
+
+def get(job_id: str) -> Optional[RenderJob]:
+    return get_queue().get(job_id)
@@ -0,0 +1,157 @@
+# modules/tts_pool.py
+# --- Tüm oturumlar için ortak, adil paylaşımlı TTS slot havuzu ---
+#
+# ElevenLabs eşzamanlılık sınırı süreç genelinde tek: FABA'daki zamanlayıcı
+# en fazla TTS_MAX_CONCURRENT isteği aynı anda gönderir. Eskiden bu slotlar
+# düz bir semaphore'du; 200 paragraflık bir render'ın worker'ları kuyruğu
+# doldurunca diğer oturumların (ve ses önizlemelerinin) istekleri onların
+# arkasında bekliyordu. Burada boşalan her slot şu sırayla verilir:
+#   1) öncelik sınıfı: "interactive" (önizleme, birkaç segmentlik render)
+#      her zaman "bulk"tan önce
+#   2) sınıf içinde kiracılar (tenant) arasında round-robin: her kiracının
+#      sırada kaç isteği olursa olsun, sıra gelince yalnızca biri geçer
+#
+# Kiracı/öncelik çağıran koddan contextvar ile gelir:
+#   with tenant("render:ab12", priority="bulk"): ...
+# FABA render worker'larına bu bağlam kopyalanır (bkz. FABA._run_jobs).
+#
+# stats(): sınıf/kiracı başına kuyruk derinliği, aktif slot, bekleme
+# süresi dağılımı (son WAIT_WINDOW istek).
+
+from __future__ import annotations
+import time, threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+PRIORITIES = ("interactive", "bulk")  # önce gelen önce hizmet alır
+DEFAULT_TENANT = ("default", "bulk")
+WAIT_WINDOW = 1000
+
+_TENANT: ContextVar[Optional[Tuple[str, str]]] = ContextVar("faba_tts_tenant", default=None)
+
+
+@contextmanager
+def tenant(name: str, priority: str = "bulk") -> Iterator[None]:
+    """Bu blokta (ve kopyalanan worker bağlamlarında) yapılan TTS istekleri `name` kiracısına sayılır."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Bilinmeyen öncelik: {priority!r} (seçenekler: {', '.join(PRIORITIES)})")
+    token = _TENANT.set((name, priority))
+    try:
+        yield
+    finally:
+        _TENANT.reset(token)
+
+
+def current() -> Optional[Tuple[str, str]]:
+    """Etkin (kiracı, öncelik); tenant() dışında None."""
+    return _TENANT.get()
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+class _Waiter:
+    __slots__ = ("granted", "since")
+
+    def __init__(self) -> None:
+        self.granted = False
+        self.since = time.monotonic()
+
+
+class FairShareGate:
+    """
+    `slots` eşzamanlı izin; `with gate.slot():` sırası öncelik sınıfına ve
+    kiracılar arası round-robin'e göre verilir.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self._free = self.slots
+        self._cond = threading.Condition()
+        # sınıf → (kiracı → bekleyenler); OrderedDict sırası round-robin sırası
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._active: Dict[str, int] = {}
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=WAIT_WINDOW) for p in PRIORITIES}
+        self._granted: Dict[str, int] = {p: 0 for p in PRIORITIES}
+
+    def _dispatch(self) -> None:
+        # _cond tutulurken çağrılır
+        granted = False
+        for prio in PRIORITIES:
+            tenants = self._queues[prio]
+            while self._free > 0 and tenants:
+                name, waiters = next(iter(tenants.items()))
+                w = waiters.popleft()
+                if waiters:
+                    tenants.move_to_end(name)  # sıradaki kiracıya geç
+                else:
+                    del tenants[name]
+                w.granted = True
+                self._free -= 1
+                granted = True
+        if granted:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        name, prio = current() or DEFAULT_TENANT
+        w = _Waiter()
+        with self._cond:
+            self._queues[prio].setdefault(name, deque()).append(w)
+            self._dispatch()
+            try:
+                while not w.granted:
+                    self._cond.wait()
+            except BaseException:
+                if w.granted:
+                    self._free += 1
+                    self._dispatch()
+                else:
+                    waiters = self._queues[prio].get(name)
+                    if waiters is not None:
+                        waiters.remove(w)
+                        if not waiters:
+                            del self._queues[prio][name]
+                raise
+            self._waits[prio].append(time.monotonic() - w.since)
+            self._granted[prio] += 1
+            self._active[name] = self._active.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._active[name] -= 1
+                if not self._active[name]:
+                    del self._active[name]
+                self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Kuyruk derinliği ve bekleme süresi (sn) metrikleri."""
+        with self._cond:
+            classes = {}
+            for prio in PRIORITIES:
+                waits = sorted(self._waits[prio])
+                classes[prio] = {
+                    "queued": sum(len(q) for q in self._queues[prio].values()),
+                    "tenants_waiting": len(self._queues[prio]),
+                    "granted": self._granted[prio],
+                    "wait_mean_s": sum(waits) / len(waits) if waits else 0.0,
+                    "wait_p50_s": _percentile(waits, 0.5) if waits else 0.0,
+                    "wait_p95_s": _percentile(waits, 0.95) if waits else 0.0,
+                    "wait_max_s": waits[-1] if waits else 0.0,
+                }
+            queued = {name: len(q) for p in PRIORITIES for name, q in self._queues[p].items()}
+            return {
+                "slots": self.slots,
+                "active": self.slots - self._free,
+                "queued": sum(c["queued"] for c in classes.values()),
+                "by_class": classes,
+                "by_tenant": {
+                    name: {"active": self._active.get(name, 0), "queued": queued.get(name, 0)}
+                    for name in sorted(set(self._active) | set(queued))
+                },
+            }
@@ -0,0 +1,176 @@
+# modules/tts_websocket.py
+# --- ElevenLabs websocket (multi-context stream-input) TTS backend ---
+#
+# HTTP backend'de her paragraf kendi isteğini kuruyor (bağlantı, auth,
+# model ısınması). Burada render boyunca HER SES için TEK bir websocket
+# açık kalır; her paragraf o bağlantı üzerinde ayrı bir "context" olarak
+# gönderilir, metin cümle cümle itilir ve ses parçaları üretildikçe gelir.
+# Aynı sesin paragrafları paralel worker'lardan aynı bağlantıyı paylaşır;
+# gelen mesajlar contextId'ye göre doğru bekleyene dağıtılır.
+#
+# `websockets` paketi yalnızca bu backend seçilince import edilir
+# (FABA_TTS_BACKEND=websocket). Sunucu adresi FABA_ELEVEN_WS_BASE ile
+# değiştirilebilir; yerel bir taklit sunucuyla test etmek için yeterli.
+
+from __future__ import annotations
+import json, uuid, base64, threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+OPEN_TIMEOUT_S = 10.0
+RECV_TIMEOUT_S = 120.0  # bir paragrafın tüm sesinin gelmesi için üst sınır
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.audio: List[bytes] = []
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class VoiceSession:
+    """
+    Tek ses için açık websocket. synthesize() thread-safe; her çağrı ayrı
+    bir context açar, tamamlanınca kapatır. Bağlantı koparsa bekleyen tüm
+    çağrılar ConnectionError alır ve oturum `closed` olur.
+    """
+
+    def __init__(self, url: str, api_key: str, voice_settings: Dict[str, Any]):
+        try:
+            from websockets.sync.client import connect
+        except ImportError as e:
+            raise RuntimeError("websocket TTS backend'i için `pip install websockets` gerekli.") from e
+        self.voice_settings = voice_settings
+        self._ws = connect(url, additional_headers={"xi-api-key": api_key},
+                           open_timeout=OPEN_TIMEOUT_S, max_size=None)
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._contexts: Dict[str, _Context] = {}
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="faba-tts-ws", daemon=True)
+        self._reader.start()
+
+    def _send(self, msg: Dict[str, Any]) -> None:
+        with self._send_lock:
+            self._ws.send(json.dumps(msg))
+
+    def synthesize(self, chunks: Iterable[str], timeout: float = RECV_TIMEOUT_S) -> bytes:
+        """Metin parçalarını sırayla iter, context'in tüm MP3 byte'larını döner."""
+        if self.closed:
+            raise ConnectionError("ElevenLabs websocket bağlantısı kapalı.")
+        cid = uuid.uuid4().hex
+        ctx = _Context()
+        with self._lock:
+            self._contexts[cid] = ctx
+        try:
+            try:
+                self._send({"text": " ", "voice_settings": self.voice_settings, "context_id": cid})
+                for chunk in chunks:
+                    if chunk.strip():
+                        self._send({"text": chunk.strip() + " ", "context_id": cid})
+                self._send({"flush": True, "context_id": cid})
+                self._send({"close_context": True, "context_id": cid})
+            except Exception as e:  # ConnectionClosed vb.
+                raise ConnectionError(f"ElevenLabs websocket gönderim hatası: {e}") from e
+            if not ctx.done.wait(timeout):
+                raise TimeoutError(f"ElevenLabs websocket: {timeout:.0f} sn içinde ses tamamlanmadı.")
+        finally:
+            with self._lock:
+                self._contexts.pop(cid, None)
+        if ctx.error is not None:
+            raise ctx.error
+        return b"".join(ctx.audio)
+
+    def _read_loop(self) -> None:
+        reason: BaseException = ConnectionError("ElevenLabs websocket bağlantısı kapandı.")
+        try:
+            for raw in self._ws:
+                msg = json.loads(raw)
+                cid = msg.get("contextId") or msg.get("context_id")
+                with self._lock:
+                    ctx = self._contexts.get(cid) if cid else None
+                if msg.get("error") or (msg.get("message") and "audio" not in msg):
+                    err = RuntimeError(f"ElevenLabs TTS failed (websocket): {msg}")
+                    if ctx is None:  # bağlantı seviyesinde hata: herkes düşer
+                        reason = err
+                        break
+                    ctx.error = err
+                    ctx.done.set()
+                    continue
+                if ctx is None:
+                    continue
+                if msg.get("audio"):
+                    ctx.audio.append(base64.b64decode(msg["audio"]))
+                if msg.get("is_final") or msg.get("isFinal"):
+                    ctx.done.set()
+        except Exception as e:  # ConnectionClosed vb.
+            reason = ConnectionError(f"ElevenLabs websocket bağlantısı koptu: {e}")
+        self.closed = True
+        with self._lock:
+            pending = list(self._contexts.values())
+        for ctx in pending:
+            if not ctx.done.is_set():
+                ctx.error = reason
+                ctx.done.set()
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._send({"close_socket": True})
+            except Exception:
+                pass
+        self.closed = True
+        self._ws.close()
+
+
+class SessionPool:
+    """
+    (ses, model, ayarlar, format) başına bir VoiceSession. Render başına
+    `with pool:` ile kullanılır: eşzamanlı render'larda sayaç tutar, son
+    render bitince tüm bağlantıları kapatır.
+    """
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str, str, str], VoiceSession] = {}
+        self._active = 0
+
+    def url(self, voice_id: str, model_id: Optional[str], output_format: str) -> str:
+        q = f"output_format={output_format}" + (f"&model_id={model_id}" if model_id else "")
+        return f"{self.base_url}/v1/text-to-speech/{voice_id}/multi-stream-input?{q}"
+
+    def session(
+        self, voice_id: str, model_id: Optional[str], voice_settings: Dict[str, Any], output_format: str
+    ) -> VoiceSession:
+        key = (voice_id, model_id or "", json.dumps(voice_settings, sort_keys=True), output_format)
+        with self._lock:
+            s = self._sessions.get(key)
+            if s is None or s.closed:
+                s = VoiceSession(self.url(voice_id, model_id, output_format), self.api_key, voice_settings)
+                self._sessions[key] = s
+            return s
+
+    def synthesize(
+        self, voice_id: str, model_id: Optional[str], voice_settings: Dict[str, Any], output_format: str,
+        chunks: Iterable[str],
+    ) -> bytes:
+        return self.session(voice_id, model_id, voice_settings, output_format).synthesize(chunks)
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for s in sessions:
+            s.close()
+
+    def __enter__(self) -> "SessionPool":
+        with self._lock:
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        with self._lock:
+            self._active -= 1
+            last = self._active == 0
+        if last:
+            self.close_all()
@@ -1,9 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import os
 from urllib.parse import urlparse
 
+from .http_session import get_session, timeouts
+
 def is_valid_url(url):
     try:
         result = urlparse(url)
@@ -16,8 +16,10 @@ def extract_text_from_url(url):
     Fetches and extracts readable text content from a given website URL.
     Returns a list of paragraphs.
     """
+    from bs4 import BeautifulSoup  # heavy; only loaded when a URL is actually fetched
+
     try:
-        response = requests.get(url, timeout=10)
+        response = get_session().get(url, timeout=timeouts(read=10))
         response.raise_for_status()
 
         soup = BeautifulSoup(response.content, "html.parser")
@@ -7,10 +7,10 @@ This module contains all the page components for the multi-step podcast generati
 - generate_page: Podcast generation and download
 """
 
-# Import all page modules for easy access
-from . import input_page
-from . import edit_page
-from . import generate_page
+# Page modules are imported lazily on first access (PEP 562): main.py only
+# loads the page for the current step, so the first render does not pay for
+# every page's dependencies.
+import importlib
 
 # Define what gets imported when someone does "from pages import *"
 __all__ = [
@@ -24,28 +24,38 @@ __version__ = '1.0.0'
 __author__ = 'Your Name'
 
 # Optional: Page registry for dynamic routing
-PAGE_REGISTRY = {
-    1: {
-        'module': input_page,
-        'name': 'Input Selection',
-        'description': 'Choose input method and upload content'
-    },
-    2: {
-        'module': edit_page,
-        'name': 'Script Editing',
-        'description': 'Edit and enhance your podcast script'
-    },
-    3: {
-        'module': generate_page,
-        'name': 'Generate Podcast',
-        'description': 'Generate and download your podcast'
-    }
+_PAGE_STEPS = {
+    1: ('input_page', 'Input Selection', 'Choose input method and upload content'),
+    2: ('edit_page', 'Script Editing', 'Edit and enhance your podcast script'),
+    3: ('generate_page', 'Generate Podcast', 'Generate and download your podcast'),
 }
 
+def _registry():
+    """PAGE_REGISTRY, built (and every page imported) on first use."""
+    if 'PAGE_REGISTRY' not in globals():
+        globals()['PAGE_REGISTRY'] = {
+            step: {
+                'module': importlib.import_module(f".{module}", __name__),
+                'name': name,
+                'description': description
+            }
+            for step, (module, name, description) in _PAGE_STEPS.items()
+        }
+    return globals()['PAGE_REGISTRY']
+
+def __getattr__(name):
+    if name == 'PAGE_REGISTRY':
+        return _registry()
+    if name in ('input_page', 'edit_page', 'generate_page', 'voices_page', 'themes_page', 'text_extraction'):
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def get_page_info(step_number):
     """Get information about a specific page step."""
-    return PAGE_REGISTRY.get(step_number, None)
+    return _registry().get(step_number, None)
 
 def get_all_pages():
     """Get all available pages."""
-    return PAGE_REGISTRY
\ No newline at end of file
+    return _registry()
\ No newline at end of file
@@ -1,9 +1,13 @@
 import streamlit as st
 import os
-from modules.FABA import generate_podcast
+import time
+import uuid
+from modules import render_jobs
 from utils.helpers import save_script_to_json
 from utils.session_state import navigate_to_step, clear_session_for_new_podcast
 
+POLL_INTERVAL_S = 1.0  # how often the page re-checks a running render job
+
 def show():
     """Display the podcast generation page"""
     st.header("🎙️ Step 6: Generate Your Podcast")
@@ -16,6 +20,7 @@ def show():
         _show_script_preview()
         st.divider()
         _show_generation_section()
+        _show_render_job()
         _show_generated_podcast()
     else:
         _show_no_data_warning()
@@ -41,17 +46,36 @@ def _show_generation_section():
     else:
         st.info("No speakers selected in Step 3. Default 2 voices will be used.")
 
+    st.checkbox(
+        "Cache per sentence (faster re-generation after small edits)",
+        key="split_sentences",
+        help="Each sentence is generated and cached separately, so fixing a typo only re-generates that sentence.",
+    )
+    st.checkbox(
+        "Batch consecutive paragraphs of the same voice",
+        key="batch_paragraphs",
+        help="Fewer, larger TTS requests for narrator-style scripts. Each paragraph is still cached on its own.",
+    )
+
+    job = _current_job()
+    busy = job is not None and not job.finished
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button(
             "🎙️ Generate Podcast Audio", 
             type="primary", 
-            use_container_width=True
+            use_container_width=True,
+            disabled=busy
         ):
             _generate_podcast()
 
+def _current_job():
+    """The render job this session is following, if the queue still knows it."""
+    job_id = st.session_state.get("render_job_id")
+    return render_jobs.get(job_id) if job_id else None
+
 def _generate_podcast():
-    """Generate the podcast audio"""
+    """Submit the podcast to the background render queue"""
     # Use the string from text area or edited_script directly
     edited_script_text = st.session_state.get('text_area_content', st.session_state.edited_script)
     
@@ -60,14 +84,58 @@ def _generate_podcast():
     
     picked = st.session_state.get("selected_speakers", [])
 
-    with st.spinner("🎙️ Generating your podcast... This may take a few minutes."):
-        try:
-            mp3_path = generate_podcast(json_path, selected_speakers=picked)
-            st.session_state.podcast_path = mp3_path
+    try:
+        # One stable output file per browser session: re-generating after an edit
+        # reuses the previous render (incremental splice) instead of piling up files
+        owner = st.session_state.setdefault("render_owner", uuid.uuid4().hex[:12])
+        st.session_state.render_job_id = render_jobs.submit(
+            json_path,
+            owner=owner,
+            selected_speakers=picked,
+            split_sentences=st.session_state.get("split_sentences", False),
+            batch_paragraphs=st.session_state.get("batch_paragraphs", False),
+        )
+        st.rerun()
+    except Exception as e:
+        st.error(f"❌ Error generating podcast: {e}")
+
+def _show_render_job():
+    """Show progress of the submitted render; polls until the job finishes."""
+    job = _current_job()
+    if job is None:
+        return
+
+    if job.status == "done":
+        if st.session_state.get("podcast_path") != job.result:
+            st.session_state.podcast_path = job.result
             st.success("✅ Podcast generated successfully!")
-            st.rerun()
-        except Exception as e:
-            st.error(f"❌ Error generating podcast: {e}")
+        return
+    if job.status == "error":
+        st.error(f"❌ Error generating podcast: {job.error}")
+        return
+    if job.status == "cancelled":
+        st.info("Render cancelled.")
+        return
+
+    p = job.progress
+    if job.status == "queued":
+        st.progress(0.0, text="⏳ Waiting for a free render slot...")
+    elif p is None:
+        st.progress(0.0, text="🎙️ Generating your podcast...")
+    elif p.phase in ("assemble", "done"):
+        st.progress(1.0, text="🎚️ Assembling the final audio...")
+    else:
+        eta = f" · about {int(p.eta_s) + 1}s left" if p.eta_s else ""
+        st.progress(p.done / p.total, text=f"🎙️ Segment {p.done}/{p.total}{eta}")
+    st.caption("Rendering runs in the background – you can leave this page and come back.")
+
+    if p is not None and job.preview_path and os.path.exists(job.preview_path):
+        st.caption(f"▶️ Listen while it renders: first {p.prefix_done} of {p.total} segments")
+        with open(job.preview_path, "rb") as f:
+            st.audio(f.read(), format="audio/mp3")
+
+    time.sleep(POLL_INTERVAL_S)
+    st.rerun()
 
 
 def _show_generated_podcast():
@@ -15,8 +15,9 @@ ELEVENLABS_VOICES = {
 
 @st.cache_data(show_spinner=False)
 def _preview_tts_bytes(voice_id: str, text: str):
-    # Your existing function here...
-    pass
+    # Previews jump ahead of running podcast renders in the shared TTS queue
+    from modules.FABA import tts_preview
+    return tts_preview(text, voice_id)
 
 def show_speaker_selection():
     st.header("🎤 Step 3: Choose Speakers")
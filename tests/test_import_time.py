@@ -0,0 +1,61 @@
+# tests/test_import_time.py
+# --- "import modules, pages" ucuz ve yan etkisiz kalmalı ---
+#
+# Streamlit her süreçte bu paketleri import ediyor; ağır bağımlılıklar
+# (pydub, bs4, Gemini SDK) ve API anahtarları ilk kullanımda çözülür.
+# Ölçüm `python -X importtime` ile ayrı bir süreçte, anahtarlar yokken.
+#
+#   python -m pytest tests/test_import_time.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 100  # modules + pages toplamı (bugün ~1 ms)
+HEAVY = ("pydub", "bs4", "google.generativeai", "docx", "streamlit")
+
+
+def _importtime(code: str):
+    env = {k: v for k, v in os.environ.items() if k not in ("ELEVEN_API_KEY", "GEMINI_API_KEY")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    # "import time:      self [us] |  cumulative | imported package"
+    rows = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows[name.strip()] = int(cumulative)
+    return rows
+
+
+def test_import_is_within_budget():
+    rows = _importtime("import modules, pages")
+    total_ms = (rows["modules"] + rows["pages"]) / 1000
+    assert total_ms < BUDGET_MS, f"import modules, pages: {total_ms:.1f} ms (bütçe {BUDGET_MS} ms)"
+
+
+def test_import_does_not_load_heavy_dependencies():
+    rows = _importtime("import modules, pages")
+    loaded = [m for m in HEAVY if m in rows]
+    assert not loaded, f"import sırasında yüklenmemeli: {loaded}"
+
+
+def test_import_needs_no_api_keys_and_no_cache_dir(tmp_path):
+    # Boş bir klasörde FABA'yı import etmek audio_cache/ oluşturmamalı, anahtar istememeli
+    env = {k: v for k, v in os.environ.items() if k not in ("ELEVEN_API_KEY", "GEMINI_API_KEY")}
+    env["PYTHONPATH"] = ROOT
+    proc = subprocess.run(
+        [sys.executable, "-c", "import modules.FABA, modules.gemini_generator"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    if "No module named" in proc.stderr:
+        pytest.skip(f"FABA bağımlılıkları kurulu değil: {proc.stderr.strip().splitlines()[-1]}")
+    assert proc.returncode == 0, proc.stderr
+    assert not os.path.exists(tmp_path / "audio_cache")
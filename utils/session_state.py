@@ -38,7 +38,7 @@ def clear_session_for_new_podcast():
     keys_to_clear = [
         'original_paragraphs', 'source_text', 'edited_script', 
         'text_area_content', 'json_path', 'podcast_path', 'input_method',
-        'selected_speakers'
+        'selected_speakers', 'render_job_id'
     ]
     for key in keys_to_clear:
         if key in st.session_state: